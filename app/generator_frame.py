@@ -7,7 +7,7 @@ from tkinter import messagebox
 from tkinter.filedialog import asksaveasfilename, askopenfilename
 from idlelib.tooltip import Hovertip
 
-from painter import ThreadPainter
+from painter import ThreadPainter, PlantSeed, ANIMATION_SPEED
 
 from plant_generator import Plant, PlantGenom, AgentGenom
 from tools import Vec2
@@ -22,6 +22,7 @@ class UserFrame(ttk.Frame):
     def __init__(self, container, controller):
         super().__init__(container)
         self.controller = controller
+        self.plant_seed = PlantSeed()
 
         self.table_height = 20
         self.table_width = 9
@@ -165,7 +166,7 @@ class UserFrame(ttk.Frame):
     def get_plant(self) -> Plant:
         plant_genome = self.get_plant_genome()
         start_pos = Vec2(0, 220)
-        plant = Plant(plant_genome, start_pos)
+        plant = Plant(plant_genome, start_pos, seed=self.plant_seed.get(plant_genome))
         return plant
 
     def set_random(self):
@@ -227,22 +228,15 @@ class UserFrame(ttk.Frame):
         """
         This method realises the "Save" button functionality;
         it saves the current canvas picture (including during
-        generation) in the .png format
+        generation) in the .png or .svg format
         """
-        host_file = asksaveasfilename(filetypes=[("Image", "*.png")],
+        host_file = asksaveasfilename(filetypes=[("Image", "*.png"), ("Vector image", "*.svg")],
                                       defaultextension=".png")
         if not host_file:
             return
 
         try:
-            plant_image = self.controller.plant_frame.get_image()
-            
-            if plant_image is None:
-                raise Exception("You haven't generated any plant!")
-
-            plant_image.save(host_file, "PNG")
-            logger.info(f"Saved plant to: {host_file}")
-            messagebox.showinfo("Message", "Image saved successfully!")
+            self.controller.plant_frame.save_image(host_file)
         except Exception as e:
             messagebox.showerror("Error", "You haven't generated any plant!")
             logger.exception(e)
@@ -272,6 +266,18 @@ class PlantFrame(ttk.Frame):
                                               variable=self.progress_var,
                                               maximum=100)
 
+        # Pace of animation in layers per second (0 to grow as fast as it can)
+        self.speed_var = tk.IntVar(value=ANIMATION_SPEED)
+        self.speed_label = ttk.Label(self, text="Speed (layers/s)")
+        self.speed_box = ttk.Spinbox(self,
+                                     from_=0,
+                                     to=10000,
+                                     increment=20,
+                                     width=6,
+                                     textvariable=self.speed_var)
+        self.speed_tip = Hovertip(self.speed_box, "Layers of plant drawn per second when animated,\n"
+                                                  "0 draws as fast as it can")
+
         plant = Plant(PlantGenom.empty(), Vec2(0, 220))
         self.current_drawing = ThreadPainter(
             plant=plant,
@@ -294,6 +300,10 @@ class PlantFrame(ttk.Frame):
 
         # Configure progress bar
         self.plant_progress.grid(row=0, column=0, pady=10)
+
+        # Configure speed of animation
+        self.speed_label.grid(row=10, column=1, sticky="e", padx=5)
+        self.speed_box.grid(row=10, column=2, sticky="w")
     
     def start_drawing(self, fast: bool = True):
         """
@@ -313,6 +323,8 @@ class PlantFrame(ttk.Frame):
                 canvas=self.canvas,
                 progress=self.progress_var,
                 fast_draw=fast,
+                speed=self.get_speed(),
+                cache=self.winfo_toplevel().render_cache,
             )
 
             self.current_drawing.start()
@@ -321,6 +333,16 @@ class PlantFrame(ttk.Frame):
                                           "All the entries have to be filled out with integers")
             logger.exception(e)
 
+    def get_speed(self) -> int:
+        """
+        Pace of animation set by user, default one if it is invalid
+        """
+        try:
+            return max(self.speed_var.get(), 0)
+        except tk.TclError:
+            self.speed_var.set(ANIMATION_SPEED)
+            return ANIMATION_SPEED
+
     def pause_drawing(self):
         self.current_drawing.pause()
 
@@ -328,7 +350,20 @@ class PlantFrame(ttk.Frame):
         self.current_drawing.resume()
 
     def get_image(self):
-        return self.current_drawing.get_image()
+        return self.current_drawing.render_final()
+
+    def save_image(self, path: str):
+        """
+        Save plant drawn so far to .png or .svg file, plant is saved
+        in background and user is told when it is saved
+        """
+        def saved(error: Exception | None):
+            if error is None:
+                messagebox.showinfo("Message", "Image saved successfully!")
+            else:
+                messagebox.showerror("Error", f"Plant isn't saved:\n{error}")
+
+        self.current_drawing.save(path, saved)
 
     def destroy(self) -> None:
         self.current_drawing.stop()
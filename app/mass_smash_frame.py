@@ -15,6 +15,7 @@ from PIL import Image, ImageDraw, ImageTk
 
 from plant_generator import Plant, PlantGenom, SmashGenom
 from generator_frame import PlantFrame
+from painter import PlantSeed
 from tools import Circle, Color, Vec2
 
 from method_config import MethodConfig
@@ -130,6 +131,7 @@ class MassSmashUserFrame(ttk.Frame):
     def __init__(self, container, controller):
         super().__init__(container)
         self.controller = controller
+        self.plant_seed = PlantSeed()
 
         self.plant_genome = PlantGenom.empty()
 
@@ -205,22 +207,15 @@ class MassSmashUserFrame(ttk.Frame):
         """
         This method realises the "Save" button functionality;
         it saves the current canvas picture (including during
-        generation) in the .png format
+        generation) in the .png or .svg format
         """
-        host_file = asksaveasfilename(filetypes=[("Image", "*.png")],
+        host_file = asksaveasfilename(filetypes=[("Image", "*.png"), ("Vector image", "*.svg")],
                                       defaultextension=".png")
         if not host_file:
             return
 
         try:
-            plant_image = self.controller.plant_frame.get_image()
-            
-            if plant_image is None:
-                raise Exception("You haven't generated any plant!")
-
-            plant_image.save(host_file, "PNG")
-            logger.info(f"Saved plant to: {host_file}")
-            messagebox.showinfo("Message", "Image saved successfully!")
+            self.controller.plant_frame.save_image(host_file)
         except Exception as e:
             messagebox.showerror("Error", "You haven't generated any plant!")
             logger.exception(e)
@@ -231,7 +226,7 @@ class MassSmashUserFrame(ttk.Frame):
     def get_plant(self) -> Plant:
         self.set_smashed_genome()
         start_pos = Vec2(0, 250)
-        plant = Plant(self.plant_genome, start_pos)
+        plant = Plant(self.plant_genome, start_pos, seed=self.plant_seed.get(self.plant_genome))
         return plant
 
 
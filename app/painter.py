@@ -5,26 +5,99 @@ from abc import ABC, abstractmethod
 
 import os
 import time
-from threading import Thread, Event, Condition
+from random import getrandbits
+from math import floor, ceil
+from threading import Thread, Event, Condition, Lock
+from collections import deque
+from typing import Callable, NamedTuple
 import tkinter as tk
 
-from PIL import Image, ImageDraw, ImageTk
-from PIL import ImageEnhance
+from PIL import Image, ImageTk
 
-from plant_generator import Plant
-from tools import Circle, Color, Vec2
+from plant_generator import Plant, PlantGenom, Renderer, RenderOptions, RenderCache, render_key
+from tools import Circle
+from tools.raster import union_box, STAMPS
 
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 POT_IMAGE_PATH = os.path.join(SCRIPT_DIR, "..", "resources", "pot_mmf_logo.png")
 BACKGROUND_IMAGE_PATH = os.path.join(SCRIPT_DIR, "..", "resources", "background.png")
 
+# Enhancement of colors of plant
+COLOR_ENHANCE = 2.0
+
+RENDER_OPTIONS = RenderOptions(saturation=COLOR_ENHANCE,
+                               background=BACKGROUND_IMAGE_PATH,
+                               pot=POT_IMAGE_PATH)
+
+# Default pace of animated (not fast) drawing of plant in layers per
+# second, so duration of animation scales with count of layers of plant
+ANIMATION_SPEED = 120
+
+# Images of grown plants, shown at once when the same plant is drawn again
+RENDER_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "DigitalGarden")
+
+
+def open_render_cache(directory: str = RENDER_CACHE_DIR) -> RenderCache | None:
+    """
+    Open cache of images of grown plants, None if its directory
+    can't be used (e.g. read-only home), plants aren't cached then
+    """
+    try:
+        return RenderCache(directory)
+    except OSError as e:
+        logger.warning(f"Plants aren't cached, cache {directory} can't be opened: {e}")
+        return None
+
+
+class PlantSeed:
+    """
+    Random seed of shown Plant
+
+    Seed is kept while genom is the same, so Plant shown again grows
+    the same (and its cached image is shown at once), Plant of new genom
+    gets new random seed
+    """
+    def __init__(self):
+        self.digest = None
+        self.seed = None
+
+    def get(self, plant_genom: PlantGenom) -> int:
+        digest = plant_genom.digest()
+        if digest != self.digest:
+            self.digest = digest
+            self.seed = getrandbits(32)
+        return self.seed
+
+
+class Frame(NamedTuple):
+    """
+    Rendered image to show on canvas
+    """
+    box: tuple[int, int, int, int] | None   # changed box of plant image, None for whole image
+    position: tuple[int, int]               # position of image on canvas
+    image: Image.Image
+
 
 class Painter(ABC):
+    """
+    Draws plant on canvas, plant image is drawn by headless `Renderer`
+
+    Animation is drawn at render size (canvas size by default), so frames
+    are shown without resampling. Drawn layers are recorded and drawn
+    again at image size (or larger) only by the final pass, when plant is
+    saved or has grown, so plant isn't grown twice
+    """
     def __init__(self, 
                  plant: Plant, 
                  canvas: tk.Canvas,
-                 image_size: tuple[int, int] = (1024, 1024)):
+                 image_size: tuple[int, int] = (1024, 1024),
+                 render_size: tuple[int, int] = None):
+        """
+        :param image_size: Size of full resolution image, plant coordinates
+                           are pixels of this image
+        :param render_size: Size of animated image, canvas size if not given
+        """
         self.plant = plant
 
         self.canvas = canvas
@@ -32,12 +105,13 @@ class Painter(ABC):
         self.height = canvas.winfo_height()
 
         self.image_size = image_size
+        self.render_size = render_size if render_size is not None else (self.width, self.height)
 
-        self.plant_image = Image.new("RGBA", self.image_size, (0, 0, 0, 0))
-        self.draw = ImageDraw.Draw(self.plant_image, "RGBA")
+        self.renderer = Renderer(plant, image_size, self.render_size, RENDER_OPTIONS)
 
-        self.image = Image.new("RGBA", self.image_size, (0, 0, 0, 0))
-        self.setup_image()
+        # Image shown on canvas, after the first frame only changed regions are patched
+        self.photo = None
+        self.rendered = False
 
     @abstractmethod
     def draw_plant(self):
@@ -46,70 +120,127 @@ class Painter(ABC):
         """
         pass
 
-    def setup_image(self):
+    def draw_circle(self, circle: Circle):
         """
-        Setup basic image
+        Draw circle on plant image
         """
-        w, h = self.image_size
-        background = Image.open(BACKGROUND_IMAGE_PATH) 
-        background.resize(self.image_size, Image.LANCZOS)
-        pot_image = Image.open(POT_IMAGE_PATH)
-        pot_image = pot_image.resize((w//4, h//4), Image.LANCZOS)
-        pot_pos = (w//2 - w//8,
-                        w//2 + self.plant.start_pos.y - 48)
-        self.image.paste(background, (0, 0))
-        self.image.paste(pot_image, pot_pos, pot_image)
+        self.renderer.draw_circle(circle)
 
-    def draw_circle(self, circle: Circle):
+    def draw_current_layer(self):
         """
-        Draw circle on plant image
+        Draw current layer of agents
         """
-        width, height = self.image_size
-        x, y = circle.pos + Vec2(width // 2, height // 2)
-        if x < 0 or x > width or y < 0 or y > height:
-            return
-        r = abs(circle.radius) + 1
+        self.renderer.draw_next_layer()
 
-        x0, y0 = x - r, y - r
-        x1, y1 = x + r, y + r
+    def render_final(self, size: tuple[int, int] = None) -> Image.Image:
+        """
+        Return plant drawn so far at full resolution (or given size)
+        """
+        return self.renderer.render_final(size)
 
-        default_color = circle.color
-        dark_color = circle.color + Color(20, 20, 20)
-        light_color = circle.color - Color(20, 20, 20)
+    def export_svg(self, path: str):
+        """
+        Write plant drawn so far to SVG file
+        """
+        self.renderer.export_svg(path)
 
-        self.draw.ellipse((x0 - 2, y0 - 2, x1 - 2, y1 - 2),
-                                    fill=dark_color.rgb)
-        self.draw.ellipse((x0 + 2, y0 + 2, x1 + 2, y1 + 2),
-                                    fill=light_color.rgb)
-        self.draw.ellipse((x0, y0, x1, y1),
-                                    fill=default_color.rgb)
+    def get_image(self, box: tuple[int, int, int, int] = None):
+        """
+        Return drawn plant on base image at render size
 
-    def draw_current_layer(self):
+        :param box: (left, top, right, bottom) box of image to return
+                    (whole image if not given)
         """
-        Draw current layer of agents
+        return self.renderer.image(box)
+
+    def get_canvas_patch(self, dirty: tuple[int, int, int, int]) -> tuple[tuple[int, int], Image.Image]:
         """
-        for circle in self.plant.get_circles():
-            self.draw_circle(circle)
+        Return part of canvas image changed by dirty box of plant image,
+        same as this part of the whole image resized to canvas
 
-    def get_image(self):
+        :param dirty: (left, top, right, bottom) changed box of plant image
+        :return: position of patch on canvas and patch
         """
-        Enhance and return drawn plant
+        w, h = self.render_size
+        if (w, h) == (self.width, self.height):
+            return dirty[:2], self.get_image(dirty)
+
+        scale_x, scale_y = self.width / w, self.height / h
+
+        # LANCZOS takes 3 pixels around (more when image is reduced)
+        support_x, support_y = 3 * max(1 / scale_x, 1), 3 * max(1 / scale_y, 1)
+
+        x0, y0, x1, y1 = dirty
+        cx0 = max(floor((x0 - support_x) * scale_x), 0)
+        cy0 = max(floor((y0 - support_y) * scale_y), 0)
+        cx1 = min(ceil((x1 + support_x) * scale_x), self.width)
+        cy1 = min(ceil((y1 + support_y) * scale_y), self.height)
+
+        # Region of plant image read by resampling of these canvas pixels
+        sx0 = max(floor(cx0 / scale_x - support_x), 0)
+        sy0 = max(floor(cy0 / scale_y - support_y), 0)
+        sx1 = min(ceil(cx1 / scale_x + support_x), w)
+        sy1 = min(ceil(cy1 / scale_y + support_y), h)
+
+        region = self.get_image((sx0, sy0, sx1, sy1))
+        patch = region.resize((cx1 - cx0, cy1 - cy0), Image.LANCZOS,
+                              box=(cx0 / scale_x - sx0, cy0 / scale_y - sy0,
+                                   cx1 / scale_x - sx0, cy1 / scale_y - sy0))
+        return (cx0, cy0), patch
+
+    def render_frame(self,
+                     dirty: tuple[int, int, int, int] = None,
+                     whole: bool = False) -> Frame | None:
         """
-        enh = ImageEnhance.Color(self.plant_image)
-        plant_image = enh.enhance(2.0)
-        image = self.image.copy()
-        image.paste(plant_image, (0, 0), plant_image)
-        return image
+        Render part of canvas image changed by dirty box,
+        the first frame (or whole one) is the whole canvas image
+
+        Rendering doesn't touch tkinter, so it may run in any thread
+
+        :param dirty: (left, top, right, bottom) changed box of plant image
+        :param whole: Render whole canvas image
+        :return: rendered frame or None if nothing changed
+        """
+        if whole or not self.rendered:
+            self.rendered = True
+            return Frame(None, (0, 0), self.fit_canvas(self.get_image()))
+
+        if dirty is None:
+            return None
+
+        position, patch = self.get_canvas_patch(dirty)
+        return Frame(dirty, position, patch)
+
+    def fit_canvas(self, image: Image.Image) -> Image.Image:
+        """
+        Resize image to canvas (if it differs)
+        """
+        if image.size == (self.width, self.height):
+            return image
+        return image.resize((self.width, self.height), Image.LANCZOS)
+
+    def show_frame(self, frame: Frame):
+        """
+        Show rendered frame on canvas, must run in tkinter mainloop
+        """
+        if frame.box is None or self.photo is None:
+            self.photo = self.canvas.image = ImageTk.PhotoImage(frame.image)
+            self.canvas.create_image(self.width // 2, self.height // 2,
+                                     anchor=tk.CENTER, image=self.canvas.image)
+            return
+
+        x, y = frame.position
+        patch_photo = ImageTk.PhotoImage(frame.image)
+        self.canvas.tk.call(str(self.photo), "copy", str(patch_photo), "-to", x, y)
 
     def update_canvas(self):
         """
-        Show image on canvas
+        Show image on canvas, after the first frame only
+        region changed since previous frame is redrawn
         """
-        canvas_image = self.get_image()
-        canvas_image = canvas_image.resize((self.width, self.height), Image.LANCZOS)
-        self.canvas.image = ImageTk.PhotoImage(canvas_image)
-        self.canvas.create_image(self.width // 2, self.height // 2,
-                                 anchor=tk.CENTER, image=self.canvas.image)
+        frame = self.render_frame(self.renderer.take_dirty())
+        if frame is not None:
+            self.show_frame(frame)
 
 
 class CustomThread(Thread):
@@ -137,58 +268,248 @@ class CustomThread(Thread):
 
 
 class ThreadPainter(Painter, CustomThread):
-    def __init__(self, plant, canvas, progress, fast_draw):
+    """
+    Painter that grows and draws plant in its own thread
+
+    Worker thread never calls tkinter: it posts rendered frames and
+    progress to single-slot queues (newer value replaces pending one)
+    and a poller in tkinter mainloop shows them
+
+    If image of plant is cached, it is shown at once, then plant is grown
+    again in worker thread without showing it (its layers are needed only
+    for SVG), so mainloop never grows plant
+
+    Plant is saved by its own thread (see `save`), which takes layers
+    under lock of growth and finishes growth of cached plant if worker
+    hasn't done it (e.g. it is stopped)
+    """
+    def __init__(self, plant, canvas, progress, fast_draw,
+                 fps: float = 30, speed: float = None,
+                 cache: RenderCache = None):
+        """
+        :param fps: Greatest count of frames shown per second when animated,
+                    layers drawn between frames are shown together
+        :param speed: Pace of animation in layers per second (e.g.
+                      `ANIMATION_SPEED`), None or 0 to grow as fast as it
+                      can, fast drawing is never paced
+        :param cache: Cache of images of grown plants (not cached if not given)
+        """
         Painter.__init__(self, plant, canvas)
         CustomThread.__init__(self)
 
         self.fast_draw = fast_draw
+        self.cache = cache
+        self.key = render_key(plant, self.image_size, RENDER_OPTIONS) if cache is not None else None
 
         self.update = None
-        self.delay = 0.01
-        
+        self.frame_interval = 1 / fps
+        self.layer_interval = 1 / speed if speed else 0
+
+        # Handoff from worker to mainloop, appending to a full
+        # deque drops the pending value
+        self.frames = deque(maxlen=1)
+        self.progress_values = deque(maxlen=1)
+
         self.progress = progress
 
+        # Held while plant grows and while its layers are taken
+        self.growth_lock = Lock()
+
         logger.info(f"Initialized{' Fast ' if self.fast_draw else ' '}ThreadPainter: {id(self)} ")
 
     def draw_plant(self):
         logger.info(f"Started generation: {id(self)}")
         self.start()
 
+    def start(self):
+        """
+        Start worker thread and poller of its frames (in mainloop)
+        """
+        super().start()
+        self.poll()
+
     def update_progress(self, value: float):
         """
-        Update status and color of progressbar
-        by given value
+        Post new value of progressbar
         """
-        if self.progress:
-           self.progress.set(value)
+        self.progress_values.append(value)
+
+    def post_frame(self, whole: bool = False):
+        """
+        Render frame changed since previous one and post it,
+        frame that wasn't shown yet is replaced by the new one
+        """
+        dirty = self.renderer.take_dirty()
+        try:
+            stale = self.frames.popleft()
+        except IndexError:
+            stale = None
+
+        # New frame covers region of replaced one too
+        if stale is not None:
+            whole = whole or stale.box is None
+            dirty = union_box(stale.box, dirty)
+
+        frame = self.render_frame(dirty, whole)
+        if frame is not None:
+            self.frames.append(frame)
+
+    def poll(self):
+        """
+        Show posted progress and frame, runs in tkinter mainloop
+        until worker thread ends
+        """
+        alive = self.is_alive()
+
+        try:
+            value = self.progress_values.popleft()
+            if self.progress:
+                self.progress.set(value)
+        except IndexError:
+            pass
+
+        try:
+            self.show_frame(self.frames.popleft())
+        except IndexError:
+            pass
+
+        if alive or self.frames or self.progress_values:
+            self.update = self.canvas.after(int(self.frame_interval * 1000), self.poll)
+        else:
+            self.update = None
+
+    def post_final(self, final: Image.Image):
+        """
+        Post whole canvas image reduced from final image,
+        it replaces frame that wasn't shown yet
+        """
+        frame = Frame(None, (0, 0), self.fit_canvas(final))
+        self.renderer.take_dirty()
+        try:
+            self.frames.popleft()
+        except IndexError:
+            pass
+        self.frames.append(frame)
+
+    def save(self, path: str, done: Callable[[Exception | None], None] = None):
+        """
+        Save plant drawn so far to .png or .svg file in saving thread,
+        so mainloop isn't blocked
+
+        :param done: Called in mainloop when plant is saved, with error
+                     (None if plant is saved)
+        """
+        errors = deque(maxlen=1)
+
+        def write():
+            try:
+                self.write(path)
+                logger.info(f"Saved plant to: {path}")
+            except Exception as e:
+                logger.exception(e)
+                errors.append(e)
+
+        saver = Thread(target=write, daemon=True)
+        saver.start()
+
+        def wait():
+            if saver.is_alive():
+                self.canvas.after(100, wait)
+            elif done is not None:
+                done(errors[0] if errors else None)
+        wait()
+
+    def write(self, path: str):
+        """
+        Write plant drawn so far to file, runs in saving thread
+        """
+        if path.lower().endswith(".svg"):
+            # Plant of cached image is grown here if worker hasn't grown it
+            with self.growth_lock:
+                layers = self.renderer.recorded_layers()
+            self.renderer.export_svg(path, (circle for layer in layers for circle in layer.circles()))
+        else:
+            # Layers are taken under lock and drawn without it, while plant grows
+            with self.growth_lock:
+                final = self.renderer.render_final() if self.renderer.loaded else None
+                layers = self.renderer.recorded_layers() if final is None else None
+            if final is None:
+                final = self.renderer.draw_layers(layers)
+            final.save(path, "PNG")
+
+    def regrow(self):
+        """
+        Grow plant of cached image to the end without showing it,
+        runs in worker thread
+        """
+        while True:
+            with self.growth_lock:
+                if self.stopped() or not self.plant.is_growing():
+                    break
+                self.draw_current_layer()
+
+        with self.growth_lock:
+            if not self.plant.is_growing():
+                self.renderer.recorded_layers()
 
     def run(self):
         logger.info(f"Running generation: {id(self)}")
-        self.update_canvas()
+        cached = self.cache.get(self.key) if self.cache is not None else None
+        if cached is not None:
+            self.renderer.load_final(cached)
+            self.update_progress(100)
+            self.post_final(cached)
+            logger.info(f"Shown cached plant: {id(self)}")
+            self.regrow()
+            return
+
+        self.post_frame(whole=True)
+
+        # Growth runs freely (or paced to speed), frames are rendered
+        # at most `fps` times per second and drop layers in between
+        start = last_frame = time.perf_counter()
+        layer = 0
 
         while self.plant.is_growing():
             with self.state:
                 if self.paused:
+                    paused = time.perf_counter()
                     self.state.wait()
+                    start += time.perf_counter() - paused
 
             if self.stopped():
                 return
 
-            self.draw_current_layer()
+            with self.growth_lock:
+                self.draw_current_layer()
             self.update_progress(self.plant.drawed / self.plant.total * 100)
+            layer += 1
 
             if not self.fast_draw: # if not fast animate
-                self.update = self.canvas.after(1, self.update_canvas)
-                time.sleep(self.delay)
+                now = time.perf_counter()
+                if now - last_frame >= self.frame_interval:
+                    self.post_frame()
+                    last_frame = now
+
+                ahead = start + layer * self.layer_interval - now
+                if ahead > 0:
+                    time.sleep(ahead)
 
         self.update_progress(100)
-        self.update_canvas()
+
+        # Grown plant is shown reduced from full resolution
+        with self.growth_lock:
+            final = self.render_final()
+        self.post_final(final)
+        if self.cache is not None:
+            self.cache.put(self.key, final)
 
         logger.info(f"Ended generation: {id(self)}")
+        logger.info(f"Circle stamps: {STAMPS}")
 
     def cancel_update(self):
         """
-        Cancel tkinter frame update
+        Cancel tkinter poller of frames
         """
         if self.update:
             self.canvas.after_cancel(self.update)
@@ -201,9 +522,4 @@ class ThreadPainter(Painter, CustomThread):
 
     def pause(self):
         logger.info(f"Paused generation: {id(self)}")
-        self.cancel_update()
         return super().pause()
-
-
-
-
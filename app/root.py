@@ -29,6 +29,7 @@ sys.excepthook = handle_exception
 import tkinter as tk
 from tkinter import ttk
 from generator_frame import PlantGenerator
+from painter import open_render_cache
 from menu_frame import Menu
 from smash_plant import SmashPlant
 from mass_smash_frame import MassSmash
@@ -44,6 +45,7 @@ class RootWindow(tk.Tk):
         self.setup_log()
         logger.info("Starting window...")
         self.setup_window()
+        self.render_cache = open_render_cache()
         
         # Creating a container
         container = tk.Frame(self)  
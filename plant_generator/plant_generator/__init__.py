@@ -1,4 +1,10 @@
-from plant_generator.genom import AgentGenom, PlantGenom
+from plant_generator.genom import AgentGenom, AgentState, PlantGenom, CompiledGenom
 from plant_generator.agent import Agent
-from plant_generator.plant import Plant
+from plant_generator.swarm import Swarm
+from plant_generator.lifetime import Lifetime
+from plant_generator.layer import Layer
+from plant_generator.viewport import Viewport
+from plant_generator.plant import Plant, GrowthEngine
 from plant_generator.smash import SmashMethod, SmashGenom
+from plant_generator.render import Renderer, RenderOptions, render, render_svg, render_poster
+from plant_generator.cache import RenderCache, render_key
@@ -1,9 +1,8 @@
 from __future__ import annotations
-from random import uniform
-from plant_generator.genom import AgentGenom, PlantGenom
-from tools import Vec2, Circle, Color
-from math import pi
-from copy import deepcopy
+from plant_generator.genom import AgentGenom, AgentState, PlantGenom, CompiledGenom
+from plant_generator.lineage import Stream, TURN, EVOLVE, heir_key
+from tools import Vec2, Circle
+from math import pi, cos, sin, hypot
 
 
 class Agent:
@@ -13,34 +12,53 @@ class Agent:
                  generation: int,
                  start_pos: Vec2, 
                  direction: int = 0,
-                 vec : Vec2 = Vec2(0, -1)):
+                 vec : Vec2 = Vec2(0, -1),
+                 key: int = 0,
+                 compiled: list[CompiledGenom] = None,
+                 state: AgentState = None):
         """
-        :param agent_genom: Genom of Agent
+        :param agent_genom: Genom of Agent (shared by its generation, not changed)
         :param plant_genom: Genom of Plant
         :param generation: Generation of Agent
         :param start_pos: Start position of Agent
+        :param key: Key of random stream of Agent (see `lineage`),
+                    Agent uses only its own random values
+        :param compiled: Compiled genom of Plant (compiled if not given)
+        :param state: Own state of Agent (taken from genom if not given)
         """
         self.agent_genom = agent_genom
         self.plant_genom = plant_genom
         self.generation = generation
+        self.key = key
+        self.turns = Stream(key, TURN)
+
+        self.compiled = compiled if compiled is not None else plant_genom.compile()
+        self.genes = self.compiled[generation]
 
         self.pos = start_pos
         self.direction = direction
+        self.turn_cos, self.turn_sin = self.genes.rotation(direction)
         self.vec = vec
-        self.agent_genom.size /= 10
+
+        self.state = state if state is not None else AgentState.from_genom(agent_genom)
+
+        # Steps Agent surely stays in viewport of Plant (if it has one)
+        self.visible_steps = 0
+        self.state.size /= 10
+
+        # Color changes are never negative, so after clamping colors once
+        # only upper bound has to be checked while growing
+        self.state.red = min(max(self.state.red, 0), 255)
+        self.state.green = min(max(self.state.green, 0), 255)
+        self.state.blue = min(max(self.state.blue, 0), 255)
 
     def get_circle(self) -> Circle:
         """
         Return circle that draw Agent
         """
 
-        # Get color values from genom
-        r = self.agent_genom.red
-        g = self.agent_genom.green
-        b = self.agent_genom.blue
-
-        color = Color(r, g, b)
-        circle = Circle(self.pos, self.agent_genom.size, color)
+        state = self.state
+        circle = Circle(self.pos, state.size, (state.red, state.green, state.blue))
 
         self.__grow_up__()
 
@@ -50,34 +68,35 @@ class Agent:
         """
         Update genom and postion of Agent
         """
-        r = self.agent_genom.red
-        g = self.agent_genom.green
-        b = self.agent_genom.blue
-
-        rc = self.agent_genom.red_changes/255
-        gc = self.agent_genom.green_changes/255
-        bc = self.agent_genom.blue_changes/255
+        genes = self.genes
+        state = self.state
 
-        c1 = Color(r, g, b)
-        c2 = Color(rc, gc, bc)
-        
-        c1 += c2
-        self.agent_genom.red = c1.r
-        self.agent_genom.green = c1.g
-        self.agent_genom.blue = c1.b
+        r = state.red + genes.red_changes
+        g = state.green + genes.green_changes
+        b = state.blue + genes.blue_changes
+        state.red = r if r < 255 else 255
+        state.green = g if g < 255 else 255
+        state.blue = b if b < 255 else 255
 
-        self.agent_genom.size += self.agent_genom.size_changes / 1000
+        state.size += genes.size_changes
 
         self.pos += self.vec
-        self.vec = self.vec.rotate(self.direction * self.agent_genom.turn * pi / 180 / 100)
 
-        rangle = self.agent_genom.random_turn * pi / 180 / 10
-        self.vec = self.vec.rotate(uniform(-rangle, rangle))
+        # Turn and random turn are done on components, only the
+        # resulting direction is a new vector
+        x, y = self.vec.x, self.vec.y
+        x, y = x * self.turn_cos - y * self.turn_sin, x * self.turn_sin + y * self.turn_cos
+        rangle = self.turns.uniform(-genes.random_turn, genes.random_turn)
+        cos_r, sin_r = cos(rangle), sin(rangle)
+        x, y = x * cos_r - y * sin_r, x * sin_r + y * cos_r
 
-        self.vec += Vec2(0, 1) * self.agent_genom.down / 1000
-        self.vec = self.vec.ort
+        y += genes.down
+        length = hypot(x, y)
+        if length == 0:
+            raise ZeroDivisionError("Can't divide Vector by Zero")
+        self.vec = Vec2(x / length, y / length)
 
-        self.agent_genom.length -= 1
+        state.length -= 1
 
     @property
     def is_live(self) -> bool:
@@ -86,7 +105,7 @@ class Agent:
 
         :return: True is Agent is live else False
         """
-        return self.agent_genom.length >= 0
+        return self.state.length >= 0
 
     def get_heirs(self) -> list[Agent]:
         """
@@ -95,29 +114,34 @@ class Agent:
         :return: list of new Agents (heirs of current Agent)
         """
         heirs = []
-        heirs_genom = self.plant_genom.evolve(self.generation+1, self.agent_genom)
+        heirs_state = self.plant_genom.evolve(self.generation+1, self.state, Stream(self.key, EVOLVE))
 
-        if heirs_genom is None:
+        if heirs_state is None:
             return []
 
+        heirs_genom = self.plant_genom.genom[self.generation+1]
+
         n = self.agent_genom.number_branches
-        angle = self.agent_genom.angle_branches
+        angle = self.state.angle_branches
 
         vec = self.vec.rotate(-(angle * (n // 2) + (0 if n % 2 else - angle / 2))*pi/180)
         for i in range(n):
-            heir_genom = deepcopy(heirs_genom)
+            heir_state = heirs_state.copy() if i < n - 1 else heirs_state
 
             heir_angle = i * angle * pi / 180
             heir_vec = vec.rotate(heir_angle)
 
             direction = 0 if heir_angle == pi/8 else (-1 if heir_angle < pi/8 else 1)
             
-            heir = Agent(agent_genom=heir_genom,
+            heir = Agent(agent_genom=heirs_genom,
                          plant_genom=self.plant_genom, 
                          generation=self.generation+1, 
                          start_pos=self.pos,
                          direction=direction,
-                         vec=heir_vec)
+                         vec=heir_vec,
+                         key=heir_key(self.key, i),
+                         compiled=self.compiled,
+                         state=heir_state)
 
             heirs.append(heir)
 
@@ -126,3 +150,4 @@ class Agent:
     def __repr__(self) -> str:
         return f"Agent({id(self)})"
         # return f"Agent(pos={self.pos}, agent_genom={self.agent_genom})"
+
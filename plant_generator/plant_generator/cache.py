@@ -0,0 +1,186 @@
+from __future__ import annotations
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import json
+from collections import OrderedDict
+from dataclasses import astuple, replace
+from hashlib import sha256
+from threading import Lock, get_ident
+
+from PIL import Image
+
+from plant_generator.plant import Plant
+from plant_generator.render import RenderOptions
+
+
+def render_key(plant: Plant,
+               image_size: tuple[int, int],
+               options: RenderOptions) -> str:
+    """
+    Key of image of grown Plant: hash of genom, image size and options
+    of rendering, options of growth (seed, start position, engine and
+    culling) are taken from Plant itself, not from options, because
+    Plant may be made without them (e.g. without viewport)
+    """
+    applied = replace(options,
+                      seed=plant.seed,
+                      start_pos=(plant.start_pos.x, plant.start_pos.y),
+                      engine=plant.engine,
+                      cull=plant.viewport is not None)
+    values = {
+        "genom": plant.plant_genom.digest(),
+        "viewport": list(astuple(plant.viewport)) if plant.viewport is not None else None,
+        "image_size": list(image_size),
+        "options": applied.digest(),
+    }
+    return sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+class RenderCache:
+    """
+    Cache of images of grown plants shared by threads
+
+    Images are kept as PNG files in directory, the least recently used
+    files are removed when their total size exceeds the limit (time of
+    use is modification time of file, so it lasts between runs). The
+    most recent images are kept in memory too
+
+    Files are listed once when cache is created, then their sizes and
+    order of use are kept in memory, so eviction never scans directory
+    """
+    def __init__(self,
+                 directory: str,
+                 max_bytes: int = 256 << 20,
+                 memory_items: int = 8):
+        """
+        :param directory: Directory of cached images (created if it doesn't exist)
+        :param max_bytes: Greatest total size of files of cached images
+        :param memory_items: Count of images kept in memory
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.memory: OrderedDict[str, Image.Image] = OrderedDict()
+        # Sizes of files by key, the least recently used first
+        self.files: OrderedDict[str, int] = OrderedDict()
+        self.total = 0
+        self.lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                files.append((stat.st_mtime_ns, entry.name[:-len(".png")], stat.st_size))
+        for _, key, size in sorted(files):
+            self.files[key] = size
+            self.total += size
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".png")
+
+    def remember(self, key: str, image: Image.Image):
+        """
+        Put image to memory, the least recently used ones are dropped
+        """
+        self.memory[key] = image
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def forget(self, key: str):
+        """
+        Remove file of key from cache
+        """
+        self.total -= self.files.pop(key, 0)
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Image.Image | None:
+        """
+        Return copy of cached image or None if it isn't cached
+
+        Lock is taken only to look up and update index of images,
+        file is read and decoded without it
+        """
+        with self.lock:
+            image = self.memory.get(key)
+            if image is not None:
+                self.memory.move_to_end(key)
+            if key in self.files:
+                self.files.move_to_end(key)
+            elif image is None:
+                return None
+        if image is not None:
+            return image.copy()
+
+        path = self.path(key)
+        try:
+            with Image.open(path) as file:
+                file.load()
+                image = file.copy()
+            os.utime(path)
+        except FileNotFoundError:
+            # File is evicted (or removed by someone else) meanwhile
+            with self.lock:
+                if not os.path.exists(path):
+                    self.total -= self.files.pop(key, 0)
+            return None
+        except OSError:
+            logger.warning(f"Removed broken cached image: {path}")
+            with self.lock:
+                self.forget(key)
+            return None
+
+        with self.lock:
+            self.remember(key, image)
+        return image.copy()
+
+    def put(self, key: str, image: Image.Image):
+        """
+        Cache image, the least recently used files are removed
+        when cache exceeds its size
+        """
+        image = image.copy()
+        with self.lock:
+            self.remember(key, image)
+
+        # PNG is encoded without lock, so other threads get images meanwhile
+        path = self.path(key)
+        temporary = f"{path}.{get_ident()}.tmp"
+        try:
+            image.save(temporary, "PNG")
+            size = os.path.getsize(temporary)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+        with self.lock:
+            os.replace(temporary, path)
+            self.total += size - self.files.pop(key, 0)
+            self.files[key] = size
+            self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used files until cache fits its size
+        (called with lock held)
+        """
+        while self.total > self.max_bytes and self.files:
+            key = next(iter(self.files))
+            self.forget(key)
+            logger.info(f"Evicted cached image: {self.path(key)}")
+
+    def clear(self):
+        """
+        Remove all cached images
+        """
+        with self.lock:
+            self.memory.clear()
+            for key in list(self.files):
+                self.forget(key)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+import numpy as np
+from plant_generator.genom import PlantGenom
+from plant_generator.lineage import EVOLVE, randints, heir_keys
+
+
+def count_layers(plant_genom: PlantGenom, key: int) -> list[int]:
+    """
+    Count circles in every layer of Plant
+
+    Only lengths of Agents decide the count, lengths of heirs are drawn
+    from random streams of their ancestors (see `lineage`) the same way
+    as all engines draw them, so count is exact for the same seed,
+    but no geometry is grown
+
+    :param plant_genom: Genom of Plant
+    :param key: Key of random stream of the first Agent
+    :return: count of circles in every layer
+    """
+    genom = plant_genom.genom
+
+    # Key, length and birth layer of every Agent of current generation
+    keys = np.array([key], dtype=np.uint64)
+    length = np.array([genom[0].length])
+    birth = np.zeros(1, dtype=int)
+    births, counts = [], []
+
+    for generation in range(len(genom)):
+        count = np.maximum(length, 0) + 1
+        births.append(birth)
+        counts.append(count)
+
+        branches = max(genom[generation].number_branches, 0)
+        if generation + 1 >= len(genom) or branches == 0:
+            break
+
+        # Heirs of one ancestor share its evolved length
+        deviation = genom[generation].length_deviation
+        heir_length = genom[generation + 1].length + randints(keys, EVOLVE, min(deviation, 0), max(deviation, 0))
+        keys = heir_keys(np.repeat(keys, branches), np.tile(np.arange(branches), len(keys)))
+        length = np.repeat(heir_length, branches)
+        birth = np.repeat(birth + count, branches)
+
+    births = np.concatenate(births)
+    deaths = births + np.concatenate(counts)
+
+    # Agent is in every layer from its birth up to its death
+    change = np.zeros(deaths.max() + 1, dtype=int)
+    np.add.at(change, births, 1)
+    np.add.at(change, deaths, -1)
+    return np.cumsum(change)[:-1].tolist()
@@ -2,8 +2,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional
 from tools import Color
-from random import randint, random, uniform
-from copy import deepcopy
+import random
+from random import Random
+from hashlib import sha256
+from math import pi, cos, sin
 
 
 @dataclass
@@ -34,27 +36,28 @@ class AgentGenom:
     down: int
 
     @staticmethod
-    def random() -> AgentGenom:
-        r, g, b = Color.random()
-        rc, gc, bc = Color.random()
+    def random(rng: Random = None) -> AgentGenom:
+        rng = rng if rng is not None else random
+        r, g, b = Color.random(rng)
+        rc, gc, bc = Color.random(rng)
 
         return AgentGenom(
-            length=randint(20, 150),
-            length_deviation=randint(-30, 30),
-            size=randint(30, 120),
-            size_from_ancestor=randint(10, 90),
-            size_from_level=randint(5, 100),
-            size_changes=randint(-30, 30),
+            length=rng.randint(20, 150),
+            length_deviation=rng.randint(-30, 30),
+            size=rng.randint(30, 120),
+            size_from_ancestor=rng.randint(10, 90),
+            size_from_level=rng.randint(5, 100),
+            size_changes=rng.randint(-30, 30),
             red=r, green=g, blue=b,
             red_changes=rc, green_changes=gc, blue_changes=bc,
-            color_deviation=randint(-20, 20),
-            color_from_ancestor=randint(0, 80),
-            number_branches=randint(1, 3),
-            angle_branches=randint(0, 120),
-            angle_deviation=randint(-30, 30),
-            turn=randint(-120, 120),
-            random_turn=randint(0, 80),
-            down=randint(-30, 30)
+            color_deviation=rng.randint(-20, 20),
+            color_from_ancestor=rng.randint(0, 80),
+            number_branches=rng.randint(1, 3),
+            angle_branches=rng.randint(0, 120),
+            angle_deviation=rng.randint(-30, 30),
+            turn=rng.randint(-120, 120),
+            random_turn=rng.randint(0, 80),
+            down=rng.randint(-30, 30)
         )
 
     @classmethod
@@ -74,6 +77,83 @@ class AgentGenom:
             yield attr, getattr(self, attr)
 
 
+@dataclass(slots=True)
+class AgentState:
+    """
+    Genes of one Agent that change while it grows or
+    differ from other Agents of the same generation
+    """
+    length: int
+    size: float
+    red: float
+    green: float
+    blue: float
+    angle_branches: int
+
+    @staticmethod
+    def from_genom(agent_genom: AgentGenom) -> AgentState:
+        """
+        Return initial state of Agent with given genom
+        """
+        return AgentState(length=agent_genom.length,
+                          size=agent_genom.size,
+                          red=agent_genom.red,
+                          green=agent_genom.green,
+                          blue=agent_genom.blue,
+                          angle_branches=agent_genom.angle_branches)
+
+    def copy(self) -> AgentState:
+        return AgentState(self.length, self.size,
+                          self.red, self.green, self.blue,
+                          self.angle_branches)
+
+
+@dataclass(frozen=True)
+class CompiledGenom:
+    """
+    Constants derived from AgentGenom of one generation,
+    which Agents use on every step instead of recomputing them
+    """
+    turn: float
+    turn_cos: float
+    turn_sin: float
+    random_turn: float
+    down: float
+    size_changes: float
+    red_changes: float
+    green_changes: float
+    blue_changes: float
+
+    @staticmethod
+    def compile(agent_genom: AgentGenom) -> CompiledGenom:
+        turn = agent_genom.turn * pi / 180 / 100
+        # Color changes are clamped same as Color does it
+        rc, gc, bc = Color(agent_genom.red_changes / 255,
+                           agent_genom.green_changes / 255,
+                           agent_genom.blue_changes / 255)
+        return CompiledGenom(
+            turn=turn,
+            turn_cos=cos(turn),
+            turn_sin=sin(turn),
+            random_turn=agent_genom.random_turn * pi / 180 / 10,
+            down=agent_genom.down / 1000,
+            size_changes=agent_genom.size_changes / 1000,
+            red_changes=rc,
+            green_changes=gc,
+            blue_changes=bc
+        )
+
+    def rotation(self, direction: int) -> tuple[float, float]:
+        """
+        Return cos and sin of turn angle for given direction
+
+        :param direction: direction of Agent (-1, 0 or 1)
+        """
+        if direction == 0:
+            return 1.0, 0.0
+        return self.turn_cos, direction * self.turn_sin
+
+
 class PlantGenom:
     def __init__(self, genom: list[AgentGenom]):
         self.genom = genom
@@ -81,53 +161,93 @@ class PlantGenom:
 
     def evolve(self,
                generation: int,
-               agent_genom: AgentGenom) -> Optional[AgentGenom]:
+               agent_state: AgentState,
+               rng: Random = None) -> Optional[AgentState]:
         """
-        Evolute genom of Agent to new generation
+        Evolute state of Agent to new generation
+
+        Genom of generation is shared by all its Agents and stays
+        unchanged, only the few genes that differ between Agents
+        are put into a new AgentState
+
+        :param generation: Generation of heir
+        :param agent_state: State of ancestor
+        :param rng: Random generator for deviations (module generator
+                    `random` if not given, so `random.seed()` applies)
         """
         if generation >= len(self.genom):
             return None
 
+        rng = rng if rng is not None else random
+
         # if randint(0,100) == 0:
         #     generation = randint(generation, len(self.genom)-1)
         
-        evolved_genom = deepcopy(self.genom[generation])
+        genom = self.genom[generation]
+        ancestor_genom = self.genom[max(generation - 1, 0)]
 
-        if evolved_genom.size_from_level != 0:
-            size_percent = evolved_genom.size_from_ancestor / 100
-            evolved_genom.size = size_percent * (self.level_sizes[generation] + evolved_genom.size)
+        size = genom.size
+        if genom.size_from_level != 0:
+            size_percent = genom.size_from_ancestor / 100
+            size = size_percent * (self.level_sizes[generation] + size)
 
-        if evolved_genom.size_from_ancestor != 0:
-            size_percent = evolved_genom.size_from_ancestor / 100
-            evolved_genom.size = size_percent * (agent_genom.size + evolved_genom.size)
+        if genom.size_from_ancestor != 0:
+            size_percent = genom.size_from_ancestor / 100
+            size = size_percent * (agent_state.size + size)
 
         def rnd(e):
             s, e = 0, e
             if e < s:
                 s, e = e, s
-            return randint(s, e)
+            return rng.randint(s, e)
 
-        evolved_genom.length += rnd(agent_genom.length_deviation)
-        evolved_genom.angle_branches += rnd(agent_genom.angle_deviation)
+        length = genom.length + rnd(ancestor_genom.length_deviation)
+        angle_branches = genom.angle_branches + rnd(ancestor_genom.angle_deviation)
 
-        ar = agent_genom.red + rnd(evolved_genom.color_deviation)
-        ag = agent_genom.green + rnd(evolved_genom.color_deviation)
-        ab = agent_genom.blue + rnd(evolved_genom.color_deviation)
-
-        sr = evolved_genom.red
-        sg = evolved_genom.green
-        sb = evolved_genom.blue
+        ar = agent_state.red + rnd(genom.color_deviation)
+        ag = agent_state.green + rnd(genom.color_deviation)
+        ab = agent_state.blue + rnd(genom.color_deviation)
 
         acolor = Color(ar, ag, ab)
-        scolor = Color(sr, sg, sb)
+        scolor = Color(genom.red, genom.green, genom.blue)
+
+        r, g, b = ((acolor + scolor) * (genom.color_from_ancestor / 100)).rgb
 
-        r, g, b = ((acolor + scolor) * (evolved_genom.color_from_ancestor / 100)).rgb
+        return AgentState(length=length,
+                          size=size,
+                          red=r, green=g, blue=b,
+                          angle_branches=angle_branches)
 
-        evolved_genom.red = r
-        evolved_genom.green = g
-        evolved_genom.blue = b
+    def compile(self) -> list[CompiledGenom]:
+        """
+        Compile genom of every generation to constants used by Agents
+        """
+        return [CompiledGenom.compile(agent) for agent in self.genom]
+
+    def circle_bounds(self) -> tuple[int, int]:
+        """
+        Least and greatest count of circles Plant of this genom can draw
 
-        return evolved_genom
+        Agent draws max(length, 0) + 1 circles, length of heir
+        deviates by `length_deviation` of its ancestor, so both bounds
+        are reached when all deviations are at the same end of range
+
+        :return: (least, greatest) count of circles
+        """
+        least = greatest = 0
+        agents = 1
+        for generation, genom in enumerate(self.genom):
+            low = high = genom.length
+            if generation > 0:
+                deviation = self.genom[generation - 1].length_deviation
+                low += min(deviation, 0)
+                high += max(deviation, 0)
+
+            least += agents * (max(low, 0) + 1)
+            greatest += agents * (max(high, 0) + 1)
+            agents *= max(genom.number_branches, 0)
+
+        return least, greatest
 
     def __iter__(self):
         """
@@ -141,9 +261,10 @@ class PlantGenom:
             yield f"Agent{i}", dict(agent)
 
     @staticmethod
-    def random(generations: int = 9) -> PlantGenom:
+    def random(generations: int = 9, rng: Random = None) -> PlantGenom:
+        rng = rng if rng is not None else random
         return PlantGenom([
-            AgentGenom.random() for _ in range(generations)
+            AgentGenom.random(rng) for _ in range(generations)
         ])
 
     @staticmethod
@@ -221,5 +342,11 @@ class PlantGenom:
 
         return genom_table
 
+    def digest(self) -> str:
+        """
+        Hash of genom, genoms with the same genes have the same hash
+        """
+        return sha256(PlantGenom.export_genom(self).encode()).hexdigest()
+
     def __repr__(self) -> str:
         return f"PlantGenom({self.genom})" 
@@ -0,0 +1,48 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from tools import Vec2, Circle
+import numpy as np
+
+
+@dataclass
+class Layer:
+    """
+    Circles of one layer of Plant packed into contiguous arrays,
+    i-th circle is (x[i], y[i]) with radius[i] and color[i]
+    """
+    x: np.ndarray       # (n,) float
+    y: np.ndarray       # (n,) float
+    radius: np.ndarray  # (n,) float
+    color: np.ndarray   # (n, 3) float (red, green, blue)
+
+    def __len__(self) -> int:
+        return len(self.radius)
+
+    @staticmethod
+    def from_arrays(pos: np.ndarray, radius: np.ndarray, color: np.ndarray) -> Layer:
+        """
+        Pack layer given by positions (n, 2), radii and colors (n, 3)
+        """
+        return Layer(
+            np.ascontiguousarray(pos[:, 0], dtype=float),
+            np.ascontiguousarray(pos[:, 1], dtype=float),
+            np.ascontiguousarray(radius, dtype=float),
+            np.ascontiguousarray(color, dtype=float)
+        )
+
+    @staticmethod
+    def from_circles(circles: list[Circle]) -> Layer:
+        """
+        Pack layer given by list of circles
+        """
+        values = np.array([(c.pos.x, c.pos.y, c.radius, *c.color) for c in circles],
+                          dtype=float).reshape(-1, 6)
+        return Layer.from_arrays(values[:, :2], values[:, 2], values[:, 3:])
+
+    def circles(self):
+        """
+        Unpack layer to circles
+        """
+        for x, y, r, rgb in zip(self.x.tolist(), self.y.tolist(),
+                                self.radius.tolist(), map(tuple, self.color.tolist())):
+            yield Circle(Vec2(x, y), r, rgb)
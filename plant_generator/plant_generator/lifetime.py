@@ -0,0 +1,203 @@
+from __future__ import annotations
+import numpy as np
+from plant_generator.genom import PlantGenom
+from plant_generator.lineage import TURN, uniforms
+from plant_generator.swarm import Swarm
+from plant_generator.viewport import Viewport
+from tools import Vec2
+
+
+class Lifetime(Swarm):
+    """
+    Growth engine that produces whole lifetimes of Agents at once
+
+    Apart from `random_turn` jitter the path of Agent is known at birth:
+    heading turns by a fixed angle, size and color change linearly.
+    So all jitter of Agent is drawn up front and its positions, radii and
+    colors are built from cumulative sums over its length. Agents of one
+    generation are grown together, then circles of all Agents are put
+    in the same order as `Swarm` draws them layer by layer
+
+    Agents that can't get to viewport at birth are dropped with all their
+    heirs before their lifetimes are grown, circles of Agents that leave
+    it later are dropped after
+    """
+    def __init__(self,
+                 plant_genom: PlantGenom,
+                 start_pos: Vec2,
+                 key: int = 0,
+                 viewport: Viewport = None):
+        """
+        :param plant_genom: Genom of Plant
+        :param start_pos: Start position of Plant
+        :param key: Key of random stream of the first Agent (see `lineage`)
+        :param viewport: Visible region of Plant, Agents that can't get
+                         back to it are dropped with all their heirs
+        """
+        super().__init__(plant_genom, start_pos, key, viewport)
+
+        self.layer = 0
+        self.layers = 0
+        self.grow_plant()
+
+    def is_growing(self) -> bool:
+        """
+        Return life status of Plant
+        """
+        return self.layer < self.layers
+
+    def step(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return next layer of circles
+
+        :return: positions, radii and colors of drawn circles
+        """
+        if self.layer >= self.layers:
+            self.layer += 1
+            return np.empty((0, 2)), np.empty(0), np.empty((0, 3))
+        start, end = self.bounds[self.layer], self.bounds[self.layer + 1]
+        self.layer += 1
+        return (self.circle_pos[start:end],
+                self.circle_size[start:end],
+                self.circle_color[start:end])
+
+    def grow_plant(self):
+        """
+        Grow all generations and sort circles into layers
+        """
+        pos, size, color, layer, agent, reach = [], [], [], [], [], []
+
+        paths = []
+        path = np.zeros((1, self.generations), dtype=int)
+        birth = np.zeros(1, dtype=int)
+        agents = 0
+
+        while True:
+            if self.viewport is not None:
+                remains = np.maximum(self.length, 0) + self.tail[self.generation]
+                visible = self.visible(self.pos, remains)
+                self.select(visible)
+                path, birth = path[visible], birth[visible]
+            if not len(self):
+                break
+
+            generation = self.generation[0]
+            cohort = self.grow_lifetimes()
+            counts = cohort["counts"]
+
+            pos.append(cohort["pos"])
+            size.append(cohort["size"])
+            color.append(cohort["color"])
+            layer.append(np.repeat(birth, counts) + cohort["step"])
+            agent.append(np.repeat(np.arange(agents, agents + len(counts)), counts))
+            reach.append(cohort["remains"] + self.tail[generation])
+            paths.append(path)
+            agents += len(counts)
+
+            self.branch()
+            if not len(self):
+                break
+
+            # Heirs of one generation are born in order of their ancestors
+            branches = self.number_branches[generation]
+            parent = np.repeat(np.arange(len(counts)), branches)
+            path = path[parent]
+            path[:, generation + 1] = np.tile(np.arange(branches), len(counts))
+            birth = (birth + counts)[parent]
+
+        if not agents:
+            self.circle_pos, self.circle_size, self.circle_color = np.empty((0, 2)), np.empty(0), np.empty((0, 3))
+            self.bounds = np.zeros(1, dtype=int)
+            return
+
+        # Order of Agents in a layer is their order in the tree of Plant
+        paths = np.concatenate(paths)
+        rank = np.empty(len(paths), dtype=int)
+        rank[np.lexsort(paths.T[::-1])] = np.arange(len(paths))
+
+        layer = np.concatenate(layer)
+        order = np.lexsort((rank[np.concatenate(agent)], layer))
+
+        self.circle_pos = np.concatenate(pos)[order]
+        self.circle_size = np.concatenate(size)[order]
+        self.circle_color = np.concatenate(color)[order]
+
+        layer = layer[order]
+        self.layers = layer[-1] + 1
+
+        if self.viewport is not None:
+            visible = self.visible(self.circle_pos, np.concatenate(reach)[order])
+            self.circle_pos, self.circle_size, self.circle_color, layer = \
+                (values[visible] for values in (self.circle_pos, self.circle_size, self.circle_color, layer))
+        self.bounds = np.searchsorted(layer, np.arange(self.layers + 1))
+
+    def grow_lifetimes(self) -> dict[str, np.ndarray]:
+        """
+        Grow whole lifetimes of current Agents (all of one generation),
+        leave them in their state at death
+
+        :return: circles of Agents grouped by Agent, step of every circle,
+                 count of circles of Agent left after every circle
+                 and count of circles of every Agent
+        """
+        gen = self.generation[0]
+        n = len(self.length)
+
+        counts = np.maximum(self.length, 0) + 1
+        steps = counts.max()
+        k = np.arange(steps + 1)
+
+        # All jitter of lifetime is drawn up front
+        rangle = self.random_turn[gen]
+        jitter = uniforms(self.key[:, None], TURN + np.arange(steps), -rangle, rangle)
+        angle = self.direction[:, None] * self.turn[gen] + jitter
+
+        vec = np.empty((n, steps + 1, 2))
+        vec[:, 0] = self.vec
+        down = self.down[gen]
+        if down == 0:
+            # Heading only turns, so its angle is a cumulative sum
+            heading = np.arctan2(self.vec[:, 1], self.vec[:, 0])[:, None]
+            heading = heading + np.concatenate([np.zeros((n, 1)), np.cumsum(angle, axis=1)], axis=1)
+            vec[:, 1:, 0] = np.cos(heading[:, 1:])
+            vec[:, 1:, 1] = np.sin(heading[:, 1:])
+        else:
+            # Down bias makes heading nonlinear, so step it for all Agents at once
+            cos, sin = np.cos(angle), np.sin(angle)
+            x, y = self.vec[:, 0].copy(), self.vec[:, 1].copy()
+            for i in range(steps):
+                x, y = x * cos[:, i] - y * sin[:, i], x * sin[:, i] + y * cos[:, i]
+                y += down
+                length = np.hypot(x, y)
+                x /= length
+                y /= length
+                vec[:, i + 1, 0] = x
+                vec[:, i + 1, 1] = y
+
+        pos = np.empty((n, steps + 1, 2))
+        pos[:, 0] = self.pos
+        pos[:, 1:] = self.pos[:, None] + np.cumsum(vec[:, :-1], axis=1)
+
+        size = self.size[:, None] + k * self.size_changes[gen]
+        color = np.minimum(self.color[:, None] + k[:, None] * self.color_changes[gen], 255)
+
+        # Circles are drawn on steps before death
+        live = k < counts[:, None]
+        rows = np.arange(n)
+
+        self.pos = pos[rows, counts]
+        self.vec = vec[rows, counts]
+        self.size = size[rows, counts]
+        self.color = color[rows, counts]
+        self.length = np.full(n, -1)
+        self.age = counts.copy()
+        self.steps += counts.sum()
+
+        return {
+            "pos": pos[live],
+            "size": size[live],
+            "color": color[live],
+            "step": np.broadcast_to(k, live.shape)[live],
+            "remains": (counts[:, None] - 1 - k)[live],
+            "counts": counts,
+        }
@@ -0,0 +1,129 @@
+from __future__ import annotations
+import numpy as np
+
+
+# Random streams of Agents
+#
+# Every Agent has its own key derived from seed of Plant and from its place
+# in the tree of Plant (key of ancestor and number of branch). Random values
+# of Agent depend only on its key and on number of the value, so no Agent
+# consumes values of another one: Agent (with all its heirs) may be dropped
+# without changing the rest of Plant, and all engines draw the same values
+
+MASK = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+# Numbers of values: turns of Agent on its steps, deviations of heirs on
+# evolution and keys of heirs, every kind has its own range
+TURN = 0
+EVOLVE = 1 << 32
+HEIR = 1 << 33
+
+
+def mix(x: int) -> int:
+    """
+    SplitMix64 of 64-bit integer
+    """
+    z = (x + GOLDEN) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def value(key: int, number: int) -> int:
+    """
+    Random 64-bit value of Agent with given number
+    """
+    return mix((key + number * 0xD1B54A32D192ED03) & MASK)
+
+
+def root_key(seed: int) -> int:
+    """
+    Key of the first Agent of Plant
+    """
+    return mix(seed & MASK)
+
+
+def heir_key(key: int, branch: int) -> int:
+    """
+    Key of heir of Agent on given branch
+    """
+    return value(key, HEIR + branch)
+
+
+class Stream:
+    """
+    Random generator of one Agent with the interface of `random.Random`
+    used by Agents (`random`, `uniform` and `randint`)
+    """
+    __slots__ = ("key", "number")
+
+    def __init__(self, key: int, number: int = 0):
+        """
+        :param key: Key of Agent
+        :param number: Number of the first value
+        """
+        self.key = key
+        self.number = number
+
+    def random(self) -> float:
+        """
+        Next float in [0, 1)
+        """
+        bits = value(self.key, self.number)
+        self.number += 1
+        return (bits >> 11) * 2.0 ** -53
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def randint(self, a: int, b: int) -> int:
+        return a + int(self.random() * (b - a + 1))
+
+
+def mix_array(x: np.ndarray) -> np.ndarray:
+    """
+    SplitMix64 of every uint64 value, same as `mix`
+    """
+    z = x + np.uint64(GOLDEN)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def values(keys: np.ndarray, numbers: np.ndarray | int) -> np.ndarray:
+    """
+    Random 64-bit values of Agents (broadcast with numbers), same as `value`
+    """
+    numbers = np.atleast_1d(numbers).astype(np.uint64)
+    return mix_array(keys + numbers * np.uint64(0xD1B54A32D192ED03))
+
+
+def floats(keys: np.ndarray, numbers: np.ndarray | int) -> np.ndarray:
+    """
+    Random floats in [0, 1), same as `Stream.random`
+    """
+    return (values(keys, numbers) >> np.uint64(11)).astype(float) * 2.0 ** -53
+
+
+def uniforms(keys: np.ndarray, numbers: np.ndarray | int,
+             a: np.ndarray | float, b: np.ndarray | float) -> np.ndarray:
+    """
+    Random floats between a and b, same as `Stream.uniform`
+    """
+    return a + (b - a) * floats(keys, numbers)
+
+
+def randints(keys: np.ndarray, numbers: np.ndarray | int,
+             a: np.ndarray | int, b: np.ndarray | int) -> np.ndarray:
+    """
+    Random integers between a and b (inclusive), same as `Stream.randint`
+    """
+    return a + np.floor(floats(keys, numbers) * (b - a + 1)).astype(int)
+
+
+def heir_keys(keys: np.ndarray, branches: np.ndarray) -> np.ndarray:
+    """
+    Keys of heirs of Agents on given branches, same as `heir_key`
+    """
+    return values(keys, HEIR + np.asarray(branches))
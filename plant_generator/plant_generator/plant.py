@@ -1,30 +1,70 @@
 from __future__ import annotations
 from plant_generator.genom import PlantGenom
 from plant_generator.agent import Agent
-from tools import Vec2
+from plant_generator.swarm import Swarm
+from plant_generator.lifetime import Lifetime
+from plant_generator.layer import Layer
+from plant_generator.census import count_layers
+from plant_generator.lineage import root_key
+from plant_generator.viewport import Viewport, tail_reach
+from tools import Vec2, Circle
+from random import getrandbits
+from enum import Enum
+import numpy as np
+
+
+class GrowthEngine(Enum):
+    Agents = "agents"
+    NumPy = "numpy"
+    Lifetime = "lifetime"
+
+    @classmethod
+    def _missing_(cls, value: str):
+        if not isinstance(value, str):
+            return None
+        value = value.lower()
+        for member in cls:
+            if member.value == value:
+                return member
+        return None
 
 
 class Plant:
     def __init__(self, 
                  plant_genom: PlantGenom,
-                 start_pos: Vec2):
+                 start_pos: Vec2,
+                 engine: GrowthEngine = GrowthEngine.Agents,
+                 seed: int = None,
+                 viewport: Viewport = None):
         """
         :param plant_genom: Genom of Plant
         :param start_pos: Start postion of Plant
+        :param engine: Engine that grows Agents of Plant
+        :param seed: Seed of random streams of Agents (random if not given),
+                     same genom and seed always give same circles
+                     (with any engine)
+        :param viewport: Visible region of Plant, if given Agents that
+                         can't get back to it are dropped with all their
+                         heirs (not grown), visible circles stay the same
         """
         self.plant_genom = plant_genom
         self.start_pos = start_pos
+        self.engine = GrowthEngine(engine)
+        self.seed = seed if seed is not None else getrandbits(32)
+        self.viewport = viewport
         self.agents = []
+        self.swarm = None
 
-        # Total count of agents
-        self.total = 1
-        for agent in self.plant_genom.genom[::-1]:
-            self.total *= agent.number_branches 
-            self.total += agent.length
-        self.total += 1
+        # Count of circles in every layer and total count of circles
+        # (culled circles are counted too)
+        self.layer_sizes = self.count_layers()
+        self.total = sum(self.layer_sizes)
 
-        # Conut of dead agents
+        # Conut of drawed (or culled) circles and layers
         self.drawed = 0
+        self.layer = 0
+        # Count of steps of Agents grown by Agents engine
+        self.agent_steps = 0
 
         self.init_agents()
 
@@ -35,22 +75,70 @@ class Plant:
             Vec2(0, 220)
         )
 
+    def count_layers(self) -> list[int]:
+        """
+        Count circles in every layer of Plant without growing it
+        (culled circles too), count is exact for seed of Plant
+        """
+        return count_layers(self.plant_genom, root_key(self.seed))
+
     def init_agents(self):
         """
         Init first Agent of Plant
         """
+        if self.engine is GrowthEngine.NumPy:
+            self.swarm = Swarm(self.plant_genom, self.start_pos, root_key(self.seed), self.viewport)
+            return
+
+        if self.engine is GrowthEngine.Lifetime:
+            self.swarm = Lifetime(self.plant_genom, self.start_pos, root_key(self.seed), self.viewport)
+            return
+
+        self.tail = tail_reach(self.plant_genom)
         self.agents.append(Agent(
             agent_genom=self.plant_genom.genom[0],
             plant_genom=self.plant_genom,
             generation=0,
-            start_pos=self.start_pos
+            start_pos=self.start_pos,
+            key=root_key(self.seed),
+            compiled=self.plant_genom.compile()
         ))
 
+    def is_culled(self, agent: Agent) -> bool:
+        """
+        Check if Agent and all its heirs can't get to viewport
+        """
+        if agent.visible_steps > 0:
+            agent.visible_steps -= 1
+            return False
+
+        # Step of Agent is a unit vector, so reach bounds distance to
+        # any future circle, extra step covers floating point error
+        reach = max(agent.state.length, 0) + self.tail[agent.generation] + 1
+        gap = reach - self.viewport.distance(agent.pos.x, agent.pos.y)
+        if gap < 0:
+            return True
+
+        # Every step reach decreases by 1 and distance by at most 1,
+        # so Agent can't be culled for the next gap / 2 steps
+        agent.visible_steps = int(gap // 2)
+        return False
+
     def is_growing(self) -> bool:
         """
-        Return life status of Plant
+        Return life status of Plant, Plant with culled Agents
+        grows (empty layers) as long as without culling
         """
-        return len(self.agents) > 0
+        return self.layer < len(self.layer_sizes)
+
+    @property
+    def steps(self) -> int:
+        """
+        Count of steps of Agents grown so far, culled Agents aren't grown
+        """
+        if self.swarm is not None:
+            return self.swarm.steps
+        return self.agent_steps
 
     def __iter__(self):
         return self.get_circles()  
@@ -59,10 +147,18 @@ class Plant:
         """
         Get circles from all Agents of Plant
         """
+        if self.swarm is not None:
+            yield from self.get_swarm_circles()
+            return
+
+        if self.viewport is not None:
+            self.agents = [agent for agent in self.agents if not self.is_culled(agent)]
+
         for agent in self.agents:
-            circle = agent.get_circle()
-            self.drawed += 1
-            yield circle
+            yield agent.get_circle()
+        self.agent_steps += len(self.agents)
+        self.drawed += self.layer_sizes[self.layer]
+        self.layer += 1
         
         new_agents = []
         for agent in self.agents:
@@ -72,6 +168,35 @@ class Plant:
                 new_agents += agent.get_heirs()
         self.agents = new_agents
 
+    def grow_circles(self):
+        """
+        Grow Plant to the end yielding its circles layer by layer
+        """
+        while self.is_growing():
+            yield from self.get_circles()
+
+    def get_swarm_circles(self):
+        """
+        Get circles of one layer grown by Swarm or Lifetime
+        """
+        yield from self.get_layer().circles()
+
+    def get_layer(self) -> Layer:
+        """
+        Get next layer of circles packed into arrays,
+        same circles as `get_circles` yields
+        """
+        if self.swarm is not None:
+            if self.swarm.is_growing():
+                pos, size, color = self.swarm.step()
+            else:
+                pos, size, color = np.empty((0, 2)), np.empty(0), np.empty((0, 3))
+            self.drawed += self.layer_sizes[self.layer]
+            self.layer += 1
+            return Layer.from_arrays(pos, size, color)
+
+        return Layer.from_circles(list(self.get_circles()))
+
     def __del__(self):
         del self.plant_genom
         del self
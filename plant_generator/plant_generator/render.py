@@ -0,0 +1,548 @@
+from __future__ import annotations
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import sha256
+from threading import Lock
+
+import numpy as np
+from PIL import Image
+
+from plant_generator.genom import PlantGenom
+from plant_generator.layer import Layer
+from plant_generator.plant import Plant, GrowthEngine
+from plant_generator.viewport import Viewport
+from tools import Circle, Rasterizer, EllipseRasterizer, TiledRasterizer, Vec2
+from tools.png import write_png
+from tools.raster import LARGE_BOX, RADIUS_PAD, bevel_offset
+from tools.svg import export_svg
+
+
+# Rasterizer backends by name, every backend is created as
+# Backend(size, origin=..., saturation=..., scale=...) and has
+# draw(x, y, radius, color), image(box) and take_dirty()
+BACKENDS = {
+    "numpy": Rasterizer,
+    "tiled": TiledRasterizer,
+    "pil": EllipseRasterizer,
+}
+# Backend "auto" is the single Rasterizer: "tiled" isn't shown to be faster
+# (see tools/benchmarks/raster_backends.py), it has to be chosen explicitly
+AUTO_BACKEND = "numpy"
+
+# Version of drawing, must be changed whenever the same options give other image
+RENDERER_VERSION = 2
+
+# Greatest count of stamp pixels of one batch of circles drawn into tile
+TILE_BATCH_PIXELS = 1 << 22
+# Greatest count of pixels of band of tiled image kept in memory (16 MB of RGBA),
+# rows of tiles of wide image are lower than tiles, so band doesn't grow with width
+BAND_PIXELS = 1 << 22
+
+
+@dataclass
+class RenderOptions:
+    """
+    Options of rendering Plant, same options give same image
+    """
+    engine: GrowthEngine = GrowthEngine.Agents
+    seed: int = None                       # random if not given
+    start_pos: tuple[float, float] = (0, 220)
+    saturation: float = 2.0                # enhancement of colors of plant (None to keep them)
+    backend: str = "auto"                  # name of rasterizer backend in BACKENDS or "auto"
+    background: str = None                 # path of background image (transparent if not given)
+    pot: str = None                        # path of pot image (no pot if not given)
+    cull: bool = True                      # skip Agents that can't get back to image
+
+    def digest(self) -> str:
+        """
+        Hash of options that change image together with version of renderer,
+        background and pot are hashed by content, backend isn't hashed
+        because all backends draw the same image
+        """
+        values = {
+            "version": RENDERER_VERSION,
+            "engine": GrowthEngine(self.engine).value,
+            "seed": self.seed,
+            "start_pos": list(self.start_pos),
+            "saturation": self.saturation,
+            "background": file_digest(self.background),
+            "pot": file_digest(self.pot),
+            "cull": self.cull,
+        }
+        return sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+def file_digest(path: str) -> str | None:
+    """
+    Hash of content of file (None if path is not given)
+    """
+    if path is None:
+        return None
+    stat = os.stat(path)
+    return _file_digest(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=64)
+def _file_digest(path: str, mtime: int, size: int) -> str:
+    with open(path, "rb") as file:
+        return sha256(file.read()).hexdigest()
+
+
+class BaseImage:
+    """
+    Read-only handle of base image (background with pot) shared by
+    all renderers of process, base image of every image size and start
+    position is loaded and composited only once
+    """
+    __slots__ = ("_image",)
+
+    _cache: dict[tuple, BaseImage] = {}
+    _lock = Lock()
+
+    def __init__(self, image: Image.Image):
+        self._image = image
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self._image.size
+
+    def copy(self) -> Image.Image:
+        """
+        Return own copy of base image
+        """
+        return self._image.copy()
+
+    def crop(self, box: tuple[int, int, int, int]) -> Image.Image:
+        """
+        Return own copy of box of base image
+        """
+        return self._image.crop(box)
+
+    def region(self, size: tuple[int, int], box: tuple[float, float, float, float]) -> Image.Image:
+        """
+        Return box of base image resized to given size, same as this box
+        of the whole base image resized, but without resizing it
+        """
+        return self._image.resize(size, Image.LANCZOS, box=box)
+
+    @staticmethod
+    def get(image_size: tuple[int, int],
+            start_pos: Vec2,
+            size: tuple[int, int] = None,
+            background: str = None,
+            pot: str = None) -> BaseImage:
+        """
+        Return shared base image for given image size and start position of Plant
+
+        :param size: Size to resize base image to (preview or poster
+                     resolution), image size if not given
+        :param background: Path of background image
+        :param pot: Path of pot image
+        """
+        image_size = tuple(image_size)
+        size = tuple(size) if size is not None else image_size
+        key = (image_size, start_pos.x, start_pos.y, size, background, pot)
+        with BaseImage._lock:
+            base = BaseImage._cache.get(key)
+        if base is not None:
+            return base
+
+        if size == image_size:
+            image = BaseImage.composite(image_size, start_pos, background, pot)
+        else:
+            full = BaseImage.get(image_size, start_pos, background=background, pot=pot)
+            image = full._image.resize(size, Image.LANCZOS)
+
+        with BaseImage._lock:
+            base = BaseImage._cache.setdefault(key, BaseImage(image))
+        logger.info(f"Composited base image: {key}")
+        return base
+
+    @staticmethod
+    def composite(image_size: tuple[int, int],
+                  start_pos: Vec2,
+                  background: str = None,
+                  pot: str = None) -> Image.Image:
+        """
+        Composite background with pot under start position of Plant
+        """
+        w, h = image_size
+        image = Image.new("RGBA", image_size, (0, 0, 0, 0))
+
+        if background is not None:
+            background_image = Image.open(background)
+            if background_image.size != image_size:
+                background_image = background_image.resize(image_size, Image.LANCZOS)
+            image.paste(background_image, (0, 0))
+
+        if pot is not None:
+            pot_image = Image.open(pot).convert("RGBA")
+            pot_image = pot_image.resize((w//4, h//4), Image.LANCZOS)
+            pot_pos = (w//2 - w//8,
+                       w//2 + int(start_pos.y) - 48)
+            image.alpha_composite(pot_image, pot_pos)
+        return image
+
+
+def make_plant(plant_genom: PlantGenom,
+               image_size: tuple[int, int] = (1024, 1024),
+               options: RenderOptions = None) -> Plant:
+    """
+    Return Plant of genom grown with given options
+    """
+    options = options if options is not None else RenderOptions()
+    viewport = Viewport.from_size(image_size) if options.cull else None
+    return Plant(plant_genom, Vec2(*options.start_pos),
+                 engine=options.engine, seed=options.seed, viewport=viewport)
+
+
+class Renderer:
+    """
+    Draws Plant into image without any GUI
+
+    Plant is drawn at render size (image size by default), its circles
+    are scaled from image size, which is the size of image Plant is
+    grown for. Drawn layers are recorded and drawn again at image size
+    (or larger) only by the final pass, so plant isn't grown twice
+    """
+    def __init__(self,
+                 plant: Plant,
+                 image_size: tuple[int, int] = (1024, 1024),
+                 render_size: tuple[int, int] = None,
+                 options: RenderOptions = None):
+        """
+        :param plant: Plant to draw
+        :param image_size: Size of full resolution image, plant coordinates
+                           are pixels of this image
+        :param render_size: Size of drawn image, image size if not given
+        :param options: Options of rendering
+        """
+        self.plant = plant
+        self.options = options if options is not None else RenderOptions()
+        self.image_size = tuple(image_size)
+        self.render_size = tuple(render_size) if render_size is not None else self.image_size
+
+        self.rasterizer = self.make_rasterizer(self.render_size)
+        self.base = self.base_image(self.render_size)
+
+        # Layers drawn so far, replayed by the final pass
+        self.layers: list[Layer] = []
+        # Final image (count of drawn layers, size, image)
+        self.final = None
+        # Final image is loaded (e.g. from cache) and Plant isn't grown
+        self.loaded = False
+
+    def make_rasterizer(self, size: tuple[int, int]):
+        """
+        Return rasterizer backend of plant image of given size,
+        plant is scaled from image size to it
+        """
+        w, h = size
+        name = self.options.backend
+        backend = BACKENDS[AUTO_BACKEND if name == "auto" else name]
+        return backend(size, origin=(w // 2, h // 2),
+                       saturation=self.options.saturation,
+                       scale=w / self.image_size[0])
+
+    def base_image(self, size: tuple[int, int]) -> BaseImage:
+        """
+        Return shared base image of given size
+        """
+        return BaseImage.get(self.image_size, self.plant.start_pos, size,
+                             self.options.background, self.options.pot)
+
+    def draw_layer(self, layer: Layer):
+        """
+        Draw layer on plant image and record it
+        """
+        self.layers.append(layer)
+        self.rasterizer.draw(layer.x, layer.y, layer.radius, layer.color)
+
+    def draw_circle(self, circle: Circle):
+        """
+        Draw circle on plant image
+        """
+        self.draw_layer(Layer.from_circles([circle]))
+
+    def draw_next_layer(self):
+        """
+        Grow and draw next layer of Plant
+        """
+        self.draw_layer(self.plant.get_layer())
+
+    def grow(self, batch: int = 4096) -> Renderer:
+        """
+        Grow and draw Plant to the end
+
+        Consecutive layers are drawn together (circles keep their order),
+        so small layers don't pay for a draw call each
+
+        :param batch: Least count of circles drawn at once
+        """
+        pending, count = [], 0
+        while self.plant.is_growing():
+            layer = self.plant.get_layer()
+            self.layers.append(layer)
+            pending.append(layer)
+            count += len(layer)
+            if count >= batch or not self.plant.is_growing():
+                x, y, radius, color = (np.concatenate(values) for values in zip(
+                    *((layer.x, layer.y, layer.radius, layer.color) for layer in pending)))
+                self.rasterizer.draw(x, y, radius, color)
+                pending, count = [], 0
+        return self
+
+    def load_final(self, image: Image.Image):
+        """
+        Use image of grown Plant at image size (e.g. cached one) as final
+        image, Plant is grown only when its layers are needed
+        """
+        self.final = (len(self.layers), self.image_size, image.copy())
+        self.loaded = True
+
+    def recorded_layers(self) -> list[Layer]:
+        """
+        Return layers drawn so far, Plant with loaded final image
+        is grown and drawn at render size first
+        """
+        if self.loaded:
+            self.loaded = False
+            self.grow()
+            self.final = (len(self.layers),) + self.final[1:]
+        return self.layers[:]
+
+    def take_dirty(self) -> tuple[int, int, int, int] | None:
+        """
+        Return box of plant image changed since previous call
+        """
+        return self.rasterizer.take_dirty()
+
+    def image(self, box: tuple[int, int, int, int] = None) -> Image.Image:
+        """
+        Return drawn plant on base image at render size
+
+        :param box: (left, top, right, bottom) box of image to return
+                    (whole image if not given)
+        """
+        plant_image = self.rasterizer.image(box)
+        image = self.base.crop(box) if box is not None else self.base.copy()
+        image.paste(plant_image, (0, 0), plant_image)
+        return image
+
+    def render_final(self, size: tuple[int, int] = None) -> Image.Image:
+        """
+        Return plant drawn so far at full resolution on base image,
+        recorded layers are drawn again instead of growing plant
+
+        :param size: Size of image, image size if not given
+                     (may be larger, e.g. (4096, 4096))
+        """
+        size = tuple(size) if size is not None else self.image_size
+        if self.loaded and size == self.image_size:
+            return self.final[2].copy()
+        layers = self.recorded_layers()
+
+        final = self.final
+        if final is not None and final[:2] == (len(layers), size):
+            return final[2].copy()
+
+        if size == self.render_size and len(layers) == len(self.layers):
+            image = self.image()
+        else:
+            image = self.draw_layers(layers, size)
+
+        self.final = (len(layers), size, image)
+        return image.copy()
+
+    def draw_layers(self, layers: list[Layer], size: tuple[int, int] = None) -> Image.Image:
+        """
+        Draw given layers (e.g. recorded ones taken by other thread)
+        on base image of given size, state of Renderer isn't used,
+        so it may be called while Plant grows
+
+        :param size: Size of image, image size if not given
+        """
+        size = tuple(size) if size is not None else self.image_size
+        start = time.perf_counter()
+        rasterizer = self.make_rasterizer(size)
+        for layer in layers:
+            rasterizer.draw(layer.x, layer.y, layer.radius, layer.color)
+
+        plant_image = rasterizer.image()
+        image = self.base_image(size).copy()
+        image.paste(plant_image, (0, 0), plant_image)
+        logger.info(f"Rendered final image {size}: {len(layers)} layers "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return image
+
+    def save_tiled(self, path: str, size: tuple[int, int], tile: int = 1024):
+        """
+        Write plant drawn so far to PNG file of given size tile by tile,
+        see `draw_tiled`
+        """
+        draw_tiled(self.recorded_layers(), path, size, self.image_size,
+                   self.plant.start_pos, self.options, tile)
+
+    def export_svg(self, path: str, circles=None):
+        """
+        Write plant to SVG file
+
+        :param path: Path of SVG file
+        :param circles: Stream of circles to write (e.g. `Plant.grow_circles()`),
+                        recorded layers if not given
+        """
+        if circles is None:
+            layers = self.recorded_layers()
+            circles = (circle for layer in layers for circle in layer.circles())
+
+        w, h = self.image_size
+        export_svg(circles, path, self.image_size,
+                   origin=(w // 2, h // 2), saturation=self.options.saturation,
+                   background=self.base_image(self.image_size).copy())
+
+
+def draw_tiled(layers: list[Layer],
+               path: str,
+               size: tuple[int, int],
+               image_size: tuple[int, int],
+               start_pos: Vec2,
+               options: RenderOptions = None,
+               tile: int = 1024):
+    """
+    Draw recorded layers of Plant into PNG file of any size (e.g. poster
+    of 16384x16384) with bounded memory
+
+    Circles are bucketed by tiles they overlap (in draw order), every tile
+    is rasterized, composited with its part of base image and put into a
+    band (row of tiles), which is written by streaming PNG encoder before
+    the next band is drawn. Band has at most `BAND_PIXELS` pixels: for wide
+    images it is lower than a tile, so peak memory is bounded by it and by
+    tile size, not by size of image. Tiles are always drawn by `Rasterizer`,
+    image is the same as drawn by it as a whole
+
+    :param layers: Recorded layers of Plant
+    :param path: Path of PNG file
+    :param size: Size of image
+    :param image_size: Size of image Plant is grown for
+    :param start_pos: Start position of Plant
+    :param options: Options of rendering
+    :param tile: Size of tile (tiles of wide image are lower)
+    """
+    options = options if options is not None else RenderOptions()
+    start = time.perf_counter()
+    width, height = size
+    scale = width / image_size[0]
+    origin = (width // 2, height // 2)
+
+    # All circles in draw order
+    x = np.concatenate([layer.x for layer in layers] + [np.empty(0)])
+    y = np.concatenate([layer.y for layer in layers] + [np.empty(0)])
+    radius = np.concatenate([layer.radius for layer in layers] + [np.empty(0)])
+    color = np.concatenate([layer.color for layer in layers] + [np.empty((0, 3))])
+
+    # Box of every circle in image, circles with center out of image are skipped
+    cx, cy = x * scale + origin[0], y * scale + origin[1]
+    r = np.abs(radius * scale) + RADIUS_PAD * scale
+    offset = bevel_offset(scale)
+    margin = r + offset + 1
+    index = np.flatnonzero((cx >= 0) & (cx <= width) & (cy >= 0) & (cy <= height))
+
+    # Bucket circles by tiles they overlap, stable sort keeps draw order in every tile
+    band_height = max(min(tile, BAND_PIXELS // width), 1)
+    columns, rows = -(-width // tile), -(-height // band_height)
+    c0 = np.clip((cx[index] - margin[index]) // tile, 0, columns - 1).astype(np.int64)
+    c1 = np.clip((cx[index] + margin[index]) // tile, 0, columns - 1).astype(np.int64)
+    r0 = np.clip((cy[index] - margin[index]) // band_height, 0, rows - 1).astype(np.int64)
+    r1 = np.clip((cy[index] + margin[index]) // band_height, 0, rows - 1).astype(np.int64)
+    spans = c1 - c0 + 1
+    count = spans * (r1 - r0 + 1)
+    item = np.repeat(np.arange(len(index)), count)
+    k = np.arange(len(item)) - np.repeat(np.cumsum(count) - count, count)
+    tile_id = (r0[item] + k // spans[item]) * columns + c0[item] + k % spans[item]
+    order = np.argsort(tile_id, kind="stable")
+    bucket = index[item[order]]
+    bounds = np.searchsorted(tile_id[order], np.arange(rows * columns + 1))
+
+    # Stamp pixels of circle (large circles are drawn without stamps)
+    area = np.where(2 * r > LARGE_BOX, 0, (2 * r + 2 * offset + 1) ** 2)
+
+    base = BaseImage.get(image_size, start_pos, background=options.background, pot=options.pot)
+
+    with write_png(path, size) as png:
+        for row in range(rows):
+            y0, y1 = row * band_height, min((row + 1) * band_height, height)
+            band = np.empty((y1 - y0, width, 4), dtype=np.uint8)
+
+            for column in range(columns):
+                x0, x1 = column * tile, min((column + 1) * tile, width)
+                rasterizer = Rasterizer(size, origin=origin, saturation=options.saturation,
+                                        scale=scale, window=(x0, y0, x1, y1))
+
+                circles = bucket[bounds[row * columns + column]:bounds[row * columns + column + 1]]
+                batches = np.cumsum(area[circles]) // TILE_BATCH_PIXELS
+                for batch in np.split(circles, np.flatnonzero(np.diff(batches)) + 1):
+                    rasterizer.draw(x[batch], y[batch], radius[batch], color[batch])
+
+                plant_image = rasterizer.image()
+                image = base.region((x1 - x0, y1 - y0),
+                                    (x0 / scale, y0 / scale, x1 / scale, y1 / scale))
+                image.paste(plant_image, (0, 0), plant_image)
+                band[:, x0:x1] = np.asarray(image)
+
+            png.write_rows(band)
+
+    logger.info(f"Drawn tiled image {size} ({columns}x{rows} tiles of {tile}): "
+                f"{len(index)} circles in {time.perf_counter() - start:.2f}s")
+
+
+def render(plant_genom: PlantGenom,
+           image_size: tuple[int, int] = (1024, 1024),
+           options: RenderOptions = None,
+           render_size: tuple[int, int] = None) -> Image.Image:
+    """
+    Grow Plant of genom and return its image
+
+    :param plant_genom: Genom of Plant
+    :param image_size: Size of image Plant is grown for
+    :param options: Options of rendering
+    :param render_size: Size of returned image, image size if not given
+    """
+    plant = make_plant(plant_genom, image_size, options)
+    return Renderer(plant, image_size, render_size, options).grow().image()
+
+
+def render_svg(plant_genom: PlantGenom,
+               path: str,
+               image_size: tuple[int, int] = (1024, 1024),
+               options: RenderOptions = None):
+    """
+    Grow Plant of genom streaming its circles to SVG file
+    """
+    plant = make_plant(plant_genom, image_size, options)
+    Renderer(plant, image_size, options=options).export_svg(path, plant.grow_circles())
+
+
+def render_poster(plant_genom: PlantGenom,
+                  path: str,
+                  size: tuple[int, int],
+                  image_size: tuple[int, int] = (1024, 1024),
+                  options: RenderOptions = None,
+                  tile: int = 1024):
+    """
+    Grow Plant of genom and write it to PNG file of given size tile by tile
+
+    :param size: Size of PNG (e.g. (16384, 16384))
+    :param image_size: Size of image Plant is grown for
+    """
+    options = options if options is not None else RenderOptions()
+    plant = make_plant(plant_genom, image_size, options)
+    layers = []
+    while plant.is_growing():
+        layers.append(plant.get_layer())
+    draw_tiled(layers, path, size, image_size, plant.start_pos, options, tile)
@@ -1,5 +1,6 @@
 from .genom import AgentGenom, PlantGenom
-from random import randint, uniform
+import random
+from random import Random
 from enum import Enum
 
 
@@ -26,16 +27,18 @@ class SmashGenom:
     """
     @staticmethod
     def mutate(genom: PlantGenom,
-               mutations: int) -> PlantGenom:
+               mutations: int,
+               rng: Random = None) -> PlantGenom:
         """
         Mutate genom
         """
+        rng = rng if rng is not None else random
         genom_table = genom.table()
 
-        mut_table = PlantGenom.random().table()
+        mut_table = PlantGenom.random(rng=rng).table()
         while mutations:
-            c = randint(0, len(genom_table) - 1)
-            r = randint(0, len(genom_table[0]) - 1)
+            c = rng.randint(0, len(genom_table) - 1)
+            r = rng.randint(0, len(genom_table[0]) - 1)
             genom_table[c][r] = mut_table[c][r]
             mutations -= 1
 
@@ -45,7 +48,8 @@ class SmashGenom:
     def probabilistic(genom1: PlantGenom,
                       genom2: PlantGenom,
                       probability: float,
-                      mutations: int) -> PlantGenom:
+                      mutations: int,
+                      rng: Random = None) -> PlantGenom:
         """
         A probabilistic method of smashing two plant genomes
 
@@ -62,27 +66,31 @@ class SmashGenom:
         :param genom2: Second parent genom
         :param probability: Probability for smash
         :param mutations: Mutations count
+        :param rng: Random generator (module generator `random` if not given)
         :return: smashed_genome
         """
+        rng = rng if rng is not None else random
+
         # Probabilistic part
         genom1_table = genom1.table()
         genom2_table = genom2.table()
         smashed_table = PlantGenom.empty().table()
         for c, agent in enumerate(smashed_table):
             for r in range(len(agent)):
-                if randint(0, 100)/100 > probability:
+                if rng.randint(0, 100)/100 > probability:
                     smashed_table[c][r] = genom2_table[c][r]
                 else:
                     smashed_table[c][r] = genom1_table[c][r]
 
         smashed_genom = PlantGenom([AgentGenom(*agent) for agent in smashed_table])
-        return SmashGenom.mutate(smashed_genom, mutations)
+        return SmashGenom.mutate(smashed_genom, mutations, rng)
 
     @staticmethod
     def average(genom1: PlantGenom,
                 genom2: PlantGenom,
                 weight: float,
-                mutations: int) -> PlantGenom:
+                mutations: int,
+                rng: Random = None) -> PlantGenom:
         """
         Method of weighted average smashing of two plant genomes
 
@@ -96,6 +104,7 @@ class SmashGenom:
         :param genom2: Second parent genom
         :param weight: Weight for average
         :param mutations: Mutations count
+        :param rng: Random generator for mutations
         :return: smashed genome
         """
         # Averaging part
@@ -112,7 +121,7 @@ class SmashGenom:
                 smashed_table[c][r] = int(weight * g1 + (1 - weight) * g2)
 
         smashed_genom = PlantGenom([AgentGenom(*agent) for agent in smashed_table])
-        return SmashGenom.mutate(smashed_genom, mutations)
+        return SmashGenom.mutate(smashed_genom, mutations, rng)
 
     @staticmethod
     def get_smash(method: SmashMethod):
@@ -129,7 +138,8 @@ class SmashGenom:
                 raise TypeError(f"Invalid method: {repr(method)}")
 
     @staticmethod
-    def mass_smash(plants: list[PlantGenom], method: SmashMethod, *args, **kwargs) -> PlantGenom:
+    def mass_smash(plants: list[PlantGenom], method: SmashMethod, *args,
+                   rng: Random = None, **kwargs) -> PlantGenom:
         """
         Smash many plant for one time
 
@@ -137,16 +147,19 @@ class SmashGenom:
         :param method_name: way (method) to smash plants
         :param *args: other args for way ???
         :param mutations: the number of mutations
+        :param rng: Random generator shared by all smashes (module
+                    generator `random` if not given)
         :return: smashed genome
         """
         if not plants:
             return PlantGenom.empty()
 
         smash = SmashGenom.get_smash(method)
+        rng = rng if rng is not None else random
         
         smashed_genome = plants[0]
         for plant_genome in plants[1:]:
-            smashed_genome = smash(smashed_genome, plant_genome, *args, **kwargs)
+            smashed_genome = smash(smashed_genome, plant_genome, *args, rng=rng, **kwargs)
 
         return smashed_genome
 
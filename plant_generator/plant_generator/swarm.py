@@ -0,0 +1,280 @@
+from __future__ import annotations
+import numpy as np
+from plant_generator.genom import PlantGenom
+from plant_generator.lineage import EVOLVE, uniforms, randints, heir_keys
+from plant_generator.viewport import Viewport, tail_reach
+from tools import Vec2
+from math import pi
+
+
+class Swarm:
+    """
+    Structure-of-arrays growth engine
+
+    Keeps state of all live Agents of Plant in NumPy arrays
+    and advances a whole layer by a few vectorized operations.
+    Rules of growth and branching and random streams of Agents
+    are the same as in `Agent`
+    """
+    # Arrays of state, one row for every live Agent
+    STATE = ("pos", "vec", "size", "color", "length", "angle",
+             "direction", "generation", "key", "age")
+
+    def __init__(self,
+                 plant_genom: PlantGenom,
+                 start_pos: Vec2,
+                 key: int = 0,
+                 viewport: Viewport = None):
+        """
+        :param plant_genom: Genom of Plant
+        :param start_pos: Start position of Plant
+        :param key: Key of random stream of the first Agent (see `lineage`)
+        :param viewport: Visible region of Plant, Agents that can't get
+                         back to it are dropped with all their heirs
+        """
+        self.plant_genom = plant_genom
+        self.viewport = viewport
+
+        # Count of steps of Agents grown so far
+        self.steps = 0
+
+        self.generations = len(plant_genom.genom)
+        self.setup_genes()
+
+        # State of live Agents
+        root = plant_genom.genom[0]
+        self.pos = np.array([[start_pos.x, start_pos.y]], dtype=float)
+        self.vec = np.array([[0.0, -1.0]])
+        self.size = np.array([root.size / 10])
+        self.color = np.clip([[root.red, root.green, root.blue]], 0, 255).astype(float)
+        self.length = np.array([root.length])
+        self.angle = np.array([root.angle_branches], dtype=float)
+        self.direction = np.zeros(1)
+        self.generation = np.zeros(1, dtype=int)
+        self.key = np.array([key], dtype=np.uint64)
+        self.age = np.zeros(1, dtype=int)
+
+    def setup_genes(self):
+        """
+        Collect genes of every generation into arrays
+        indexed by generation
+        """
+        def gene(name: str) -> np.ndarray:
+            return np.array([getattr(agent, name) for agent in self.plant_genom.genom],
+                            dtype=float)
+
+        # Constants used on every step
+        compiled = self.plant_genom.compile()
+        def constant(name: str) -> np.ndarray:
+            return np.array([getattr(genes, name) for genes in compiled], dtype=float)
+
+        self.turn = constant("turn")
+        self.random_turn = constant("random_turn")
+        self.down = constant("down")
+        self.size_changes = constant("size_changes")
+        self.color_changes = np.stack([constant("red_changes"),
+                                       constant("green_changes"),
+                                       constant("blue_changes")], axis=1)
+
+        # Genes used on branching
+        self.number_branches = np.maximum(gene("number_branches"), 0).astype(int)
+        self.length_deviation = gene("length_deviation").astype(int)
+        self.angle_deviation = gene("angle_deviation").astype(int)
+
+        # Genes used on evolution
+        self.base_length = gene("length").astype(int)
+        self.base_size = gene("size")
+        self.base_angle = gene("angle_branches")
+        self.base_color = np.clip(np.stack([gene("red"),
+                                            gene("green"),
+                                            gene("blue")], axis=1), 0, 255)
+        self.size_from_ancestor = gene("size_from_ancestor")
+        self.size_from_level = gene("size_from_level")
+        self.color_from_ancestor = gene("color_from_ancestor")
+        self.color_deviation = gene("color_deviation").astype(int)
+
+        self.tail = np.array(tail_reach(self.plant_genom))
+
+        level_sizes = self.plant_genom.level_sizes[:self.generations]
+        self.level_sizes = np.zeros(self.generations)
+        self.level_sizes[:len(level_sizes)] = level_sizes
+
+    def __len__(self) -> int:
+        return len(self.length)
+
+    def is_growing(self) -> bool:
+        """
+        Return life status of Swarm
+        """
+        return len(self) > 0
+
+    def select(self, index: np.ndarray):
+        """
+        Keep (or repeat) rows of Agents given by index or mask
+        """
+        for name in self.STATE:
+            setattr(self, name, getattr(self, name)[index])
+
+    def step(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Advance all Agents by one layer
+
+        :return: positions, radii and colors of drawn circles
+        """
+        if self.viewport is not None:
+            self.cull()
+        layer = (self.pos.copy(), self.size.copy(), self.color.copy())
+        self.steps += len(self)
+        self.grow_up()
+        self.branch()
+        return layer
+
+    def visible(self, pos: np.ndarray, reach: np.ndarray) -> np.ndarray:
+        """
+        Mask of points from which a line of Agents can get to viewport
+
+        Step of Agent is a unit vector, so reach bounds distance to
+        any future circle, extra step covers floating point error.
+        Distance minus reach never decreases along a line of heirs,
+        so an invisible Agent never has visible circles later
+
+        :param pos: positions of Agents (or of their circles)
+        :param reach: greatest count of steps from every position
+                      to the last circle of heirs
+        """
+        return self.viewport.distances(pos[:, 0], pos[:, 1]) <= reach + 1
+
+    def cull(self):
+        """
+        Drop Agents that (with all their heirs) can't get to viewport,
+        so neither they nor their heirs are grown
+        """
+        reach = np.maximum(self.length, 0) + self.tail[self.generation]
+        visible = self.visible(self.pos, reach)
+        if not visible.all():
+            self.select(visible)
+
+    def grow_up(self):
+        """
+        Update genes and positions of all Agents
+        """
+        gen = self.generation
+
+        self.color += self.color_changes[gen]
+        np.clip(self.color, 0, 255, out=self.color)
+
+        self.size += self.size_changes[gen]
+
+        self.pos += self.vec
+
+        rangle = self.random_turn[gen]
+        angle = self.direction * self.turn[gen] + uniforms(self.key, self.age, -rangle, rangle)
+        self.age += 1
+        self.vec = rotate(self.vec, np.cos(angle), np.sin(angle))
+
+        self.vec[:, 1] += self.down[gen]
+        self.vec /= np.hypot(self.vec[:, 0], self.vec[:, 1])[:, None]
+
+        self.length -= 1
+
+    def branch(self):
+        """
+        Replace dead Agents by their heirs, keeping order of Agents
+        """
+        dead = self.length < 0
+        if not dead.any():
+            return
+
+        spawn = dead & (self.generation + 1 < self.generations)
+        parents = np.flatnonzero(spawn)
+        branches = self.number_branches[self.generation[parents]]
+
+        counts = np.where(dead, 0, 1)
+        counts[parents] = branches
+        source = np.repeat(np.arange(len(self)), counts)
+        heir = ~np.repeat(~dead, counts)
+
+        heirs = self.evolve(parents)
+        parent_angle = self.angle[parents]
+
+        self.select(source)
+
+        # Heirs of one parent share its evolved genes
+        owner = np.repeat(np.arange(len(parents)), branches)
+        heir_index = np.arange(len(owner)) - np.repeat(np.cumsum(branches) - branches, branches)
+        self.size[heir] = heirs["size"][owner] / 10
+        self.color[heir] = heirs["color"][owner]
+        self.length[heir] = heirs["length"][owner]
+        self.angle[heir] = heirs["angle"][owner]
+        self.generation[heir] += 1
+        self.key[heir] = heir_keys(self.key[heir], heir_index)
+        self.age[heir] = 0
+
+        # Fan heirs around direction of parent
+        n = np.repeat(branches, branches)
+        angle = parent_angle[owner]
+        offset = -(angle * (n // 2) + np.where(n % 2, 0, -angle / 2))
+        heir_angle = heir_index * angle * pi / 180
+        turn = offset * pi / 180 + heir_angle
+        self.vec[heir] = rotate(self.vec[heir], np.cos(turn), np.sin(turn))
+        self.direction[heir] = np.where(heir_angle == pi / 8, 0,
+                                        np.where(heir_angle < pi / 8, -1, 1))
+
+    def evolve(self, parents: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        Evolve genes of dying Agents to the next generation,
+        same as `PlantGenom.evolve` does for one Agent
+
+        :param parents: indices of dying Agents
+        :return: evolved genes for every parent
+        """
+        gen = self.generation[parents]
+        child = gen + 1
+
+        size = self.base_size[child]
+        from_level = self.size_from_level[child] != 0
+        from_ancestor = self.size_from_ancestor[child] != 0
+        percent = self.size_from_ancestor[child] / 100
+        size = np.where(from_level, percent * (self.level_sizes[child] + size), size)
+        size = np.where(from_ancestor, percent * (self.size[parents] + size), size)
+
+        key = self.key[parents]
+        length = self.base_length[child] + self.deviate(key, 0, self.length_deviation[gen])
+        angle = self.base_angle[child] + self.deviate(key, 1, self.angle_deviation[gen])
+
+        deviation = np.repeat(self.color_deviation[child][:, None], 3, axis=1)
+        ancestor_color = np.clip(self.color[parents] + self.deviate(key[:, None], np.arange(2, 5), deviation),
+                                 0, 255)
+        color = np.clip(ancestor_color + self.base_color[child], 0, 255)
+        color = np.trunc(color * self.color_from_ancestor[child][:, None] / 100)
+
+        return {
+            "size": size,
+            "length": length,
+            "angle": angle,
+            "color": np.clip(color, 0, 255),
+        }
+
+    def deviate(self, key: np.ndarray, number: np.ndarray | int, deviation: np.ndarray) -> np.ndarray:
+        """
+        Random integers between 0 and deviation (inclusive), drawn on
+        evolution as `PlantGenom.evolve` draws them
+
+        :param key: keys of Agents
+        :param number: number of deviation drawn by evolution
+        """
+        low = np.minimum(deviation, 0)
+        high = np.maximum(deviation, 0)
+        return randints(key, EVOLVE + np.asarray(number), low, high)
+
+
+def rotate(vec: np.ndarray, cos: np.ndarray, sin: np.ndarray) -> np.ndarray:
+    """
+    Rotate every row vector by its own angle given by cos and sin
+
+    | cos(a)  -sin(a) |   | x |
+    |                 | x |   |
+    | sin(a)   cos(a) |   | y |
+    """
+    x, y = vec[:, 0], vec[:, 1]
+    return np.stack([x * cos - y * sin, x * sin + y * cos], axis=1)
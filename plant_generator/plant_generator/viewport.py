@@ -0,0 +1,68 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from plant_generator.genom import PlantGenom
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Viewport:
+    """
+    Visible region of Plant in coordinates of its circles
+
+    Agent moves by a vector of unit length on every step, so circles
+    of Agent and of all its heirs lie within `reach` steps from it.
+    When distance from Agent to Viewport is greater than its reach
+    none of these circles can be visible and they may be skipped
+    """
+    left: float
+    top: float
+    right: float
+    bottom: float
+
+    @staticmethod
+    def from_size(image_size: tuple[int, int]) -> Viewport:
+        """
+        Viewport of image with origin of Plant in its center,
+        same region where Painter draws circles
+        """
+        width, height = image_size
+        return Viewport(-(width // 2), -(height // 2),
+                        width - width // 2, height - height // 2)
+
+    def distance(self, x: float, y: float) -> float:
+        """
+        Distance from point to Viewport (0 inside)
+        """
+        dx = max(self.left - x, 0, x - self.right)
+        dy = max(self.top - y, 0, y - self.bottom)
+        return (dx * dx + dy * dy) ** 0.5
+
+    def distances(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Distances from every point to Viewport (0 inside)
+        """
+        dx = np.maximum(np.maximum(self.left - x, x - self.right), 0)
+        dy = np.maximum(np.maximum(self.top - y, y - self.bottom), 0)
+        return np.hypot(dx, dy)
+
+
+def tail_reach(plant_genom: PlantGenom) -> list[int]:
+    """
+    Greatest count of steps from the last circle of Agent of every
+    generation to the last circle of its heirs
+
+    Agent with `length` draws its circles in next max(length, 0)
+    steps, so its reach is max(length, 0) + tail_reach[generation]
+
+    :param plant_genom: Genom of Plant
+    """
+    genom = plant_genom.genom
+    tail = [0] * len(genom)
+    for generation in range(len(genom) - 2, -1, -1):
+        if genom[generation].number_branches <= 0:
+            continue
+        heir = genom[generation + 1]
+        length = heir.length + max(genom[generation].length_deviation, 0)
+        # Heir is born one step after the last circle of its ancestor
+        tail[generation] = 1 + max(length, 0) + tail[generation + 1]
+    return tail
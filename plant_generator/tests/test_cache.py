@@ -0,0 +1,69 @@
+import os
+from random import Random
+import numpy as np
+from PIL import Image
+from plant_generator import PlantGenom, RenderOptions, Renderer, RenderCache, render_key
+from plant_generator.render import make_plant
+
+
+def test_render_cache(tmp_path):
+    cache = RenderCache(str(tmp_path), memory_items=1)
+    image = Image.new("RGBA", (64, 64), (10, 20, 30, 255))
+
+    assert cache.get("a") is None, "Cache has image that wasn't put"
+    cache.put("a", image)
+    cache.put("b", Image.new("RGBA", (64, 64)))
+    assert "a" not in cache.memory, "Least recently used image is kept in memory"
+    assert (np.array(cache.get("a")) == np.array(image)).all(), "Image from disk differs"
+
+    # Order of use is taken from modification times of files when cache is created
+    size = os.path.getsize(cache.path("a"))
+    os.utime(cache.path("b"), ns=(0, 0))
+    cache = RenderCache(str(tmp_path), max_bytes=2 * size, memory_items=1)
+    cache.put("c", image)
+    assert not os.path.exists(cache.path("b")), "Least recently used file isn't evicted"
+    assert os.path.exists(cache.path("a")), "Recently used file is evicted"
+    assert os.path.exists(cache.path("c")), "New file is evicted"
+    assert cache.total == 2 * size, "Total size of files is wrong"
+    assert not list(tmp_path.glob("*.tmp")), "Temporary file is left"
+
+    os.remove(cache.path("a"))
+    assert cache.get("a") is None, "Removed file is got"
+    assert "a" not in cache.files and cache.total == size, "Removed file is kept in index"
+
+
+def test_render_key():
+    genom = PlantGenom.random(4, Random(1))
+    options = RenderOptions()
+    plant = make_plant(genom, (200, 200), RenderOptions(seed=3))
+    same = make_plant(PlantGenom.import_genom(PlantGenom.export_genom(genom)), (200, 200),
+                      RenderOptions(seed=3))
+
+    assert render_key(plant, (200, 200), options) == render_key(same, (200, 200), options), \
+        "Same genom and seed give different keys"
+    assert render_key(plant, (200, 200), options) != render_key(plant, (100, 100), options), \
+        "Key doesn't depend on image size"
+    assert render_key(plant, (200, 200), options) != render_key(
+        make_plant(genom, (200, 200), RenderOptions(seed=1)), (200, 200), options), \
+        "Key doesn't depend on seed"
+    assert render_key(plant, (200, 200), options) != render_key(
+        make_plant(genom, (200, 200), RenderOptions(seed=3, cull=False)), (200, 200), options), \
+        "Key doesn't depend on culling of Plant"
+
+    plain = make_plant(genom, (200, 200), RenderOptions(seed=3, cull=False))
+    assert render_key(plain, (200, 200), RenderOptions(cull=True)) == \
+        render_key(plain, (200, 200), RenderOptions(cull=False)), \
+        "Key depends on culling in options that Plant wasn't made with"
+
+
+def test_load_final():
+    genom = PlantGenom.random(4, Random(2))
+    options = RenderOptions(seed=4)
+    final = Renderer(make_plant(genom, (200, 200), options), (200, 200), options=options).grow().render_final()
+
+    renderer = Renderer(make_plant(genom, (200, 200), options), (200, 200), (100, 100), options)
+    renderer.load_final(final)
+    assert renderer.plant.layer == 0, "Plant of loaded image is grown"
+    assert (np.array(renderer.render_final()) == np.array(final)).all(), "Loaded image differs"
+    assert (np.array(renderer.render_final((100, 100))) == np.array(renderer.image())).all(), \
+        "Plant of loaded image isn't drawn when its layers are needed"
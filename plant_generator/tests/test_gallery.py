@@ -0,0 +1,73 @@
+import os
+import sys
+from random import Random
+from dataclasses import replace
+from plant_generator import PlantGenom
+
+# Gallery script lies in resources directory of repository
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "resources"))
+import draw_plant  # noqa: E402
+
+
+def write_genom(path, seed: int):
+    with open(path, "w") as file:
+        file.write(PlantGenom.export_genom(PlantGenom.random(3, Random(seed))))
+
+
+def crash(path_to_plant, path_to_save, options):
+    os._exit(1)
+
+
+def test_gallery_failures(tmp_path, monkeypatch):
+    plants, gallery = tmp_path / "plants", tmp_path / "gallery"
+    plants.mkdir()
+    gallery.mkdir()
+    write_genom(plants / "valid.txt", 1)
+    (plants / "invalid.txt").write_text("not a genome")
+
+    results = {os.path.basename(result.source): result
+               for result in draw_plant.draw_all_plants(str(plants), str(gallery), workers=1)}
+    assert results["valid.txt"].error is None, "Valid genome isn't drawn"
+    assert results["invalid.txt"].error is not None, "Invalid genome isn't reported"
+    assert (gallery / "valid.png").is_file(), "Image of valid genome isn't saved"
+
+    # Crashed worker breaks the pool, its plants fail instead of the whole build
+    monkeypatch.setattr(draw_plant, "draw_gallery_plant", crash)
+    results = draw_plant.draw_all_plants(str(plants), str(gallery), workers=1, force=True)
+    assert len(results) == 2, "Plants of crashed worker aren't reported"
+    assert all(result.error is not None for result in results), "Plant of crashed worker isn't failed"
+
+
+def test_gallery_incremental(tmp_path):
+    plants, gallery = tmp_path / "plants", tmp_path / "gallery"
+    plants.mkdir()
+    gallery.mkdir()
+    write_genom(plants / "a.txt", 1)
+    write_genom(plants / "b.txt", 2)
+    (plants / "c.txt").write_text("not a genome")
+
+    def draw(**kwargs) -> list[str]:
+        results = draw_plant.draw_all_plants(str(plants), str(gallery), workers=1, **kwargs)
+        return sorted(os.path.basename(result.source) for result in results)
+
+    assert draw() == ["a.txt", "b.txt", "c.txt"], "Not all genomes are drawn"
+    assert draw() == ["c.txt"], "Unchanged genomes are drawn again or failed one isn't retried"
+
+    write_genom(plants / "a.txt", 3)
+    assert draw() == ["a.txt", "c.txt"], "Only changed genome must be drawn"
+
+    options = replace(draw_plant.GALLERY_OPTIONS, saturation=1.0)
+    assert draw(options=options) == ["a.txt", "b.txt", "c.txt"], "Changed settings don't redraw plants"
+
+    # Outputs of other extension are kept apart
+    assert draw(extension=".svg", options=options) == ["a.txt", "b.txt", "c.txt"], "SVG outputs aren't drawn"
+    assert draw(options=options) == ["c.txt"], "Drawing SVG outputs changed PNG ones"
+
+    os.remove(plants / "b.txt")
+    os.remove(plants / "c.txt")
+    assert draw(options=options) == [], "Remaining genome is drawn again"
+    assert not (gallery / "b.png").exists(), "Output of deleted genome isn't removed"
+    assert (gallery / "a.png").exists(), "Output of remaining genome is removed"
+    assert (gallery / "b.svg").exists(), "Output of other extension is removed"
+
+    assert draw(options=options, force=True) == ["a.txt"], "Forced build doesn't draw all genomes"
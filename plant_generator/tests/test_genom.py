@@ -1,3 +1,6 @@
+import random
+from random import Random
+from plant_generator import PlantGenom, AgentState, SmashGenom, SmashMethod
 
 
 def test_agent_genom():
@@ -6,3 +9,46 @@ def test_agent_genom():
 
 def test_plant_genom():
     pass
+
+
+def test_evolve_seed():
+    genom = PlantGenom.random(rng=Random(1))
+    ancestor = AgentState.from_genom(genom.genom[0])
+    assert genom.evolve(1, ancestor, Random(7)) == genom.evolve(1, ancestor, Random(7)), \
+           "Same seed gives different evolution"
+
+
+def test_evolve_keeps_genom():
+    genom = PlantGenom.random(rng=Random(1))
+    table = genom.table()
+    genom.evolve(1, AgentState.from_genom(genom.genom[0]), Random(7))
+    assert genom.table() == table, "Evolution changed genom of Plant"
+
+
+def test_smash_seed():
+    parents = [PlantGenom.random(rng=Random(i)) for i in range(3)]
+    for method in SmashMethod:
+        smashed1 = SmashGenom.mass_smash(parents, method, 0.5, 10, rng=Random(3))
+        smashed2 = SmashGenom.mass_smash(parents, method, 0.5, 10, rng=Random(3))
+        assert smashed1.table() == smashed2.table(), "Same seed gives different smash"
+
+
+def test_module_seed():
+    random.seed(11)
+    genom1 = PlantGenom.random()
+    smashed1 = SmashGenom.mass_smash([genom1, PlantGenom.random()], SmashMethod.Probabilistic, 0.5, 10)
+    random.seed(11)
+    genom2 = PlantGenom.random()
+    smashed2 = SmashGenom.mass_smash([genom2, PlantGenom.random()], SmashMethod.Probabilistic, 0.5, 10)
+    assert genom1.table() == genom2.table(), "random.seed() doesn't apply to random genom"
+    assert smashed1.table() == smashed2.table(), "random.seed() doesn't apply to smash"
+
+
+def test_circle_bounds():
+    genom = PlantGenom.empty(3)
+    for agent in genom.genom:
+        agent.length = 10
+        agent.length_deviation = -4
+        agent.number_branches = 2
+    assert genom.circle_bounds() == (11 + 2 * 7 + 4 * 7, 11 + 2 * 11 + 4 * 11), \
+           "Invalid bounds of count of circles"
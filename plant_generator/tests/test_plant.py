@@ -1,4 +1,127 @@
+from random import Random
+from plant_generator import Plant, PlantGenom, AgentGenom, GrowthEngine, Viewport
+from tools import Vec2
+
+
+def straight_genom() -> str:
+    """
+    Genom without any randomness in growth
+    """
+    genom = PlantGenom([AgentGenom.random() for _ in range(5)])
+    for agent in genom.genom:
+        agent.length = 30
+        agent.length_deviation = 0
+        agent.angle_deviation = 0
+        agent.color_deviation = 0
+        agent.random_turn = 0
+    return PlantGenom.export_genom(genom)
+
+
+def grow(plant: Plant) -> list[list[tuple]]:
+    layers = []
+    while plant.is_growing():
+        layers.append([(*c.pos, c.radius, *c.color) for c in plant.get_circles()])
+    return layers
 
 
 def test_plant():
     pass
+
+
+def test_growth_engine():
+    assert GrowthEngine("NumPy") is GrowthEngine.NumPy, "Engine name isn't case insensitive"
+    for value in (5, "unknown"):
+        try:
+            GrowthEngine(value)
+        except ValueError:
+            continue
+        assert False, f"Invalid engine {value!r} is accepted"
+
+
+def assert_same_plants(plant1: list[list[tuple]], plant2: list[list[tuple]]):
+    assert len(plant1) == len(plant2), "Invalid count of layers"
+    for layer1, layer2 in zip(plant1, plant2):
+        assert len(layer1) == len(layer2), "Invalid count of circles in layer"
+        for c1, c2 in zip(layer1, layer2):
+            assert all(abs(v1 - v2) < 1e-6 for v1, v2 in zip(c1, c2)), "Invalid circle"
+
+
+def test_numpy_engine():
+    genom = straight_genom()
+    agents = grow(Plant(PlantGenom.import_genom(genom), Vec2(0, 220), GrowthEngine.Agents))
+    swarm = grow(Plant(PlantGenom.import_genom(genom), Vec2(0, 220), GrowthEngine.NumPy))
+    assert_same_plants(agents, swarm)
+
+
+def test_lifetime_engine():
+    genom = straight_genom()
+    agents = grow(Plant(PlantGenom.import_genom(genom), Vec2(0, 220), GrowthEngine.Agents))
+    lifetime = grow(Plant(PlantGenom.import_genom(genom), Vec2(0, 220), GrowthEngine.Lifetime))
+    assert_same_plants(agents, lifetime)
+
+
+def test_seed():
+    genom = PlantGenom.random(4, Random(5))
+    for engine in GrowthEngine:
+        plant1 = grow(Plant(genom, Vec2(0, 220), engine, seed=42))
+        plant2 = grow(Plant(genom, Vec2(0, 220), engine, seed=42))
+        assert plant1 == plant2, "Same genom and seed give different plants"
+
+
+def test_layer_sizes():
+    genom = PlantGenom.random(4, Random(5))
+    least, greatest = genom.circle_bounds()
+    for engine in GrowthEngine:
+        plant = Plant(genom, Vec2(0, 220), engine, seed=42)
+        layers = [len(layer) for layer in grow(plant)]
+        assert layers == plant.layer_sizes, "Invalid predicted count of circles in layers"
+        assert plant.drawed == plant.total, "Invalid predicted count of circles"
+        assert least <= plant.total <= greatest, "Count of circles out of bounds"
+
+
+def test_get_layer():
+    genom = PlantGenom.random(4, Random(5))
+    for engine in GrowthEngine:
+        circles = grow(Plant(genom, Vec2(0, 220), engine, seed=42))
+        plant = Plant(genom, Vec2(0, 220), engine, seed=42)
+        layers = []
+        while plant.is_growing():
+            layer = plant.get_layer()
+            assert layer.x.flags.c_contiguous and layer.color.shape == (len(layer), 3), \
+                   "Layer is not packed"
+            layers.append([(*c.pos, c.radius, *c.color) for c in layer.circles()])
+        assert layers == circles, "Layer differs from circles"
+
+
+def test_viewport():
+    genom = PlantGenom.random(4, Random(5))
+    viewport = Viewport(-40, 150, 40, 230)
+    def visible(plant: list[list[tuple]]) -> list[list[tuple]]:
+        return [[c for c in layer if viewport.distance(c[0], c[1]) == 0] for layer in plant]
+
+    for engine in GrowthEngine:
+        plant = grow(Plant(genom, Vec2(0, 220), engine, seed=42))
+        culled_plant = Plant(genom, Vec2(0, 220), engine, seed=42, viewport=viewport)
+        culled = grow(culled_plant)
+        assert visible(culled) == visible(plant), "Culling changed visible circles"
+        assert sum(map(len, culled)) < sum(map(len, plant)), "Nothing is culled"
+        assert culled_plant.drawed == culled_plant.total, "Culled circles are not counted"
+
+
+def test_culling_work():
+    genom = PlantGenom.random(4, Random(5))
+    viewport = Viewport(-20, 200, 20, 230)
+    for engine in GrowthEngine:
+        plant = Plant(genom, Vec2(0, 220), engine, seed=42)
+        culled_plant = Plant(genom, Vec2(0, 220), engine, seed=42, viewport=viewport)
+        grow(plant)
+        grow(culled_plant)
+        assert plant.steps == plant.total, "Every circle is a step of Agent"
+        assert culled_plant.steps < plant.steps, "Culled Agents are still grown"
+
+
+def test_engines_seed():
+    genom = PlantGenom.random(4, Random(5))
+    agents = grow(Plant(genom, Vec2(0, 220), GrowthEngine.Agents, seed=42))
+    for engine in (GrowthEngine.NumPy, GrowthEngine.Lifetime):
+        assert_same_plants(agents, grow(Plant(genom, Vec2(0, 220), engine, seed=42)))
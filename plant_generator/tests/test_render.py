@@ -0,0 +1,54 @@
+import sys
+from random import Random
+import numpy as np
+from PIL import Image
+from plant_generator import PlantGenom, RenderOptions, Renderer, render
+from plant_generator.render import make_plant
+
+
+def test_render_backends():
+    genom = PlantGenom.random(4, Random(1))
+    options = RenderOptions(seed=1, backend="numpy")
+    image = render(genom, (200, 200), options)
+    reference = render(genom, (200, 200), RenderOptions(seed=1, backend="pil"))
+
+    assert image.size == (200, 200), "Invalid size of image"
+    assert (np.array(image) == np.array(reference)).all(), "Backends draw different images"
+
+
+def test_render_final():
+    genom = PlantGenom.random(4, Random(2))
+    options = RenderOptions(seed=2)
+    renderer = Renderer(make_plant(genom, (200, 200), options), (200, 200), (100, 100), options).grow()
+
+    assert renderer.image().size == (100, 100), "Invalid render size"
+    final = renderer.render_final()
+    assert (np.array(final) == np.array(render(genom, (200, 200), options))).all(), \
+        "Final pass differs from plant drawn at full resolution"
+    assert (np.array(renderer.draw_layers(renderer.layers[:])) == np.array(final)).all(), \
+        "Snapshot of layers is drawn differently"
+
+
+def test_draw_tiled(tmp_path, monkeypatch):
+    genom = PlantGenom.random(4, Random(3))
+    options = RenderOptions(seed=3)
+    renderer = Renderer(make_plant(genom, (200, 200), options), (200, 200), options=options).grow()
+
+    path = tmp_path / "tiled.png"
+    renderer.save_tiled(str(path), (300, 300), tile=70)
+    assert (np.array(Image.open(path)) == np.array(renderer.render_final((300, 300)))).all(), \
+        "Tiled image differs from image drawn as a whole"
+
+    # Band of wide image is lower than tile
+    monkeypatch.setattr(sys.modules["plant_generator.render"], "BAND_PIXELS", 300 * 16)
+    renderer.save_tiled(str(path), (300, 300), tile=70)
+    assert (np.array(Image.open(path)) == np.array(renderer.render_final((300, 300)))).all(), \
+        "Image drawn in low bands differs from image drawn as a whole"
+
+
+def test_options_digest():
+    options = RenderOptions(seed=1)
+
+    assert options.digest() == RenderOptions(seed=1, backend="pil").digest(), \
+        "Digest depends on backend"
+    assert options.digest() != RenderOptions(seed=2).digest(), "Digest doesn't depend on seed"
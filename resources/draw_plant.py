@@ -1,82 +1,209 @@
 import os
+import json
+import time
+import traceback
 from os.path import isfile
+from dataclasses import dataclass, replace
+from hashlib import sha256
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from plant_generator import Plant, PlantGenom
-from tools import Vec2, Color
-
-from PIL import Image, ImageDraw
-from PIL import ImageEnhance
-from tools.circle import Circle
+from plant_generator import PlantGenom, RenderOptions, render, render_svg, render_poster
 
 
+# Script lies in resources directory itself
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-POT_IMAGE_PATH = os.path.join(SCRIPT_DIR, "resources", "pot_mmf_logo.png")
-BACKGROUND_IMAGE_PATH = os.path.join(SCRIPT_DIR, "resources", "background.png")
-
-
-def draw_circle(draw, 
-                image_size: tuple[int, int], 
-                circle: Circle):
-    width, height = image_size
-    x, y = circle.pos + Vec2(width // 2, height // 2)
-    if x < 0 or x > width or y < 0 or y > height:
-        return
-    r = abs(circle.radius) + 1
-
-    x0, y0 = x - r, y - r
-    x1, y1 = x + r, y + r
-
-    default_color = circle.color
-    dark_color = circle.color + Color(20, 20, 20)
-    light_color = circle.color - Color(20, 20, 20)
-
-    draw.ellipse((x0 - 2, y0 - 2, x1 - 2, y1 - 2),
-                                fill=dark_color.rgb)
-    draw.ellipse((x0 + 2, y0 + 2, x1 + 2, y1 + 2),
-                                fill=light_color.rgb)
-    draw.ellipse((x0, y0, x1, y1),
-                                fill=default_color.rgb)
-
-
-def draw_plant_from_file(path_to_plant: str, path_to_save: str):
+POT_IMAGE_PATH = os.path.join(SCRIPT_DIR, "pot_mmf_logo.png")
+BACKGROUND_IMAGE_PATH = os.path.join(SCRIPT_DIR, "background.png")
+
+RENDER_OPTIONS = RenderOptions(saturation=2.0,
+                               background=BACKGROUND_IMAGE_PATH,
+                               pot=POT_IMAGE_PATH)
+
+# Gallery is parallel by processes, so every plant is drawn by one thread
+GALLERY_OPTIONS = replace(RENDER_OPTIONS, backend="numpy")
+
+# Manifest of gallery: output of every genome with hashes it was drawn for,
+# outputs of every extension are kept apart
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass
+class GalleryResult:
+    """
+    Result of drawing one plant of gallery
+    """
+    source: str
+    output: str
+    seconds: float
+    error: str = None   # traceback if plant wasn't drawn
+
+
+def draw_plant_from_file(path_to_plant: str,
+                         path_to_save: str,
+                         options: RenderOptions = RENDER_OPTIONS,
+                         size: tuple[int, int] = None):
+    """
+    Grow plant of genome file and save it as .png,
+    or stream its circles to .svg file
+
+    :param size: Size of poster .png drawn tile by tile
+                 (e.g. (16384, 16384)), 1024x1024 image if not given
+    """
     genome = None
     with open(path_to_plant, "r") as file:
         genome = PlantGenom.import_genom(file.read())
-    plant = Plant(genome, Vec2(0, 220))
-
     image_size = (1024, 1024)
-    plant_image = Image.new("RGBA", image_size, (255, 255, 255, 0)) 
-    draw = ImageDraw.Draw(plant_image)
-
-    while plant.is_growing():
-        for circle in plant.get_circles():
-            draw_circle(draw, image_size, circle)
-
-    enh = ImageEnhance.Color(plant_image)
-    plant_image = enh.enhance(2.0)
 
-    w, h = image_size
-    image = Image.open(BACKGROUND_IMAGE_PATH)
-    pot_image = Image.open(POT_IMAGE_PATH)
-    pot_image = pot_image.resize((w//4, h//4), Image.LANCZOS)
-    pot_pos = (w//2 - w//8, w//2 + plant.start_pos.y - 48)
-    image.paste(pot_image, pot_pos, pot_image)
-    image.paste(plant_image, (0, 0), plant_image)
-
-    image.save(path_to_save)
+    if path_to_save.endswith(".svg"):
+        render_svg(genome, path_to_save, image_size, options)
+        return
 
+    if size is not None:
+        render_poster(genome, path_to_save, size, image_size, options)
+        return
 
-def draw_all_plants(path_to_plants: str, path_to_save: str):
-    for filename in os.listdir(path_to_plants):
+    render(genome, image_size, options).save(path_to_save)
+
+
+def load_manifest(path: str) -> dict:
+    """
+    Return entries of manifest by extension
+    {extension: {output: {"source", "genome", "settings"}}},
+    empty if manifest doesn't exist or is broken
+    """
+    try:
+        with open(path, "r") as file:
+            outputs = json.load(file)["outputs"]
+        if not all(isinstance(plants, dict) for plants in outputs.values()):
+            return {}
+        return outputs
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+
+
+def save_manifest(path: str, outputs: dict):
+    """
+    Replace manifest atomically, so interrupted build keeps the old one
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "w") as file:
+        json.dump({"outputs": outputs}, file, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def content_digest(path: str) -> str:
+    """
+    Hash of content of genome file
+    """
+    with open(path, "rb") as file:
+        return sha256(file.read()).hexdigest()
+
+
+def draw_gallery_plant(path_to_plant: str, path_to_save: str, options: RenderOptions) -> GalleryResult:
+    """
+    Draw one plant of gallery (in worker process), errors are returned, not raised
+    """
+    start = time.perf_counter()
+    try:
+        draw_plant_from_file(path_to_plant, path_to_save, options)
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return GalleryResult(path_to_plant, path_to_save, time.perf_counter() - start, error)
+
+
+def draw_all_plants(path_to_plants: str,
+                    path_to_save: str,
+                    extension: str = ".png",
+                    workers: int = None,
+                    options: RenderOptions = GALLERY_OPTIONS,
+                    force: bool = False) -> list[GalleryResult]:
+    """
+    Draw every genome (.txt) of directory to gallery in process pool,
+    results are reported as soon as plants are drawn, so slow genome
+    holds up only its own worker
+
+    Gallery is rebuilt incrementally: manifest in gallery maps every
+    output (by extension) to hashes of genome and of render settings
+    (with version of renderer) it was drawn for, so only new or changed
+    genomes are drawn and outputs of deleted genomes are removed.
+    Outputs of other extensions are left as they are
+
+    :param workers: Count of processes (count of cores if not given)
+    :param force: Draw all genomes even if they didn't change
+    :return: results of drawn plants
+    """
+    manifest_path = os.path.join(path_to_save, MANIFEST_NAME)
+    outputs = load_manifest(manifest_path)
+    manifest = outputs.setdefault(extension, {})
+    settings = sha256(f"{options.digest()} {extension}".encode()).hexdigest()
+
+    jobs, entries = [], {}
+    for filename in sorted(os.listdir(path_to_plants)):
         filepath = os.path.join(path_to_plants, filename)
-        name = filename.split(".txt")[0] + ".png"
+        name = filename.split(".txt")[0] + extension
         savepath = os.path.join(path_to_save, name)
         if os.path.isfile(filepath) and filename.endswith(".txt"):
+            entries[name] = {"source": filename, "genome": content_digest(filepath), "settings": settings}
+            if force or manifest.get(name) != entries[name] or not os.path.isfile(savepath):
+                jobs.append((filepath, savepath))
+
+    # Outputs of deleted genomes
+    for name in list(manifest):
+        if name not in entries:
+            savepath = os.path.join(path_to_save, name)
+            if os.path.isfile(savepath):
+                os.remove(savepath)
+                print(f"Removed {savepath} of deleted {manifest[name].get('source')}")
+            del manifest[name]
+
+    print(f"Drawing {len(jobs)} of {len(entries)} plants ({len(entries) - len(jobs)} are up to date)")
+    start = time.perf_counter()
+    results = []
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(draw_gallery_plant, filepath, savepath, options): (filepath, savepath)
+                       for filepath, savepath in jobs}
             try:
-                draw_plant_from_file(filepath, savepath)
-                print(f"Successfully drawed {filepath} and saved to {savepath}")
-            except:
-                print(f"Invalid plant: {filepath}")
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception:
+                        # Worker itself failed (e.g. crashed process breaks the pool)
+                        result = GalleryResult(*futures[future], 0.0, traceback.format_exc())
+                    results.append(result)
+                    name = os.path.basename(result.output)
+                    if result.error is None:
+                        manifest[name] = entries[name]
+                    else:
+                        manifest.pop(name, None)
+                    report(result, len(results), len(jobs))
+            finally:
+                save_manifest(manifest_path, outputs)
+    else:
+        save_manifest(manifest_path, outputs)
+
+    failed = [result for result in results if result.error is not None]
+    print(f"Drawed {len(results) - len(failed)} of {len(jobs)} plants "
+          f"in {time.perf_counter() - start:.2f}s, {len(failed)} failed")
+    if results:
+        slowest = max(results, key=lambda result: result.seconds)
+        print(f"Slowest plant: {slowest.source} ({slowest.seconds:.2f}s)")
+    for result in failed:
+        print(f"Failed: {result.source}: {result.error.strip().splitlines()[-1]}")
+    return results
+
+
+def report(result: GalleryResult, done: int, count: int):
+    """
+    Print result of one plant
+    """
+    if result.error is None:
+        print(f"[{done}/{count}] Successfully drawed {result.source} "
+              f"and saved to {result.output} in {result.seconds:.2f}s")
+    else:
+        print(f"[{done}/{count}] Invalid plant: {result.source} "
+              f"({result.seconds:.2f}s)\n{result.error}")
 
 
 if __name__ == "__main__":
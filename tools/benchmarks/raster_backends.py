@@ -0,0 +1,56 @@
+"""
+Compare drawing time of `Rasterizer` and `TiledRasterizer`
+
+Circles are drawn in batches, like the final pass of `Renderer` does,
+into images of several sizes. `TiledRasterizer` draws tiles in threads,
+so it may be faster than `Rasterizer` only on more than one core:
+
+    python benchmarks/raster_backends.py [count of circles] [batch]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from tools import Rasterizer, TiledRasterizer
+
+
+def random_circles(count: int, seed: int = 1) -> tuple[np.ndarray, ...]:
+    """
+    Circles of about plant sizes in image of size 1024
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, 200, count)
+    y = rng.normal(-100, 200, count)
+    radius = rng.gamma(2.0, 3.0, count)
+    color = rng.uniform(0, 255, (count, 3))
+    return x, y, radius, color
+
+
+def measure(backend, size: int, circles: tuple[np.ndarray, ...], batch: int, repeat: int = 2) -> float:
+    """
+    The least time of drawing all circles into image of given size
+    """
+    x, y, radius, color = circles
+    best = float("inf")
+    for _ in range(repeat):
+        rasterizer = backend((size, size), origin=(size // 2, size // 2), scale=size / 1024)
+        start = time.perf_counter()
+        for i in range(0, len(x), batch):
+            rasterizer.draw(x[i:i + batch], y[i:i + batch], radius[i:i + batch], color[i:i + batch])
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    circles = random_circles(count)
+
+    print(f"{count} circles in batches of {batch}, {os.cpu_count()} cores")
+    for size in (1024, 2048, 4096):
+        single = measure(Rasterizer, size, circles, batch)
+        tiled = measure(TiledRasterizer, size, circles, batch)
+        print(f"{size}x{size}: Rasterizer {single:.2f}s, TiledRasterizer {tiled:.2f}s "
+              f"(x{single / tiled:.2f})")
@@ -1,3 +1,4 @@
+import random
 from tools import Color 
 
 
@@ -12,3 +13,10 @@ def test_color():
     c2 = Color(45, 243, 156)
     assert c1 + c2 == (255, 255, 255), "Invalid addition rgb result"
     assert c2 - c1 == (0, 220, 0), "Invalid subtraction rgb result"
+
+
+def test_color_random_seed():
+    random.seed(3)
+    first = Color.random().rgb
+    random.seed(3)
+    assert Color.random().rgb == first, "Color isn't drawn from module generator"
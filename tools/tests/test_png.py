@@ -0,0 +1,34 @@
+from io import BytesIO
+import numpy as np
+from PIL import Image
+import pytest
+from tools.png import PngWriter, write_png
+
+
+def test_png_writer():
+    rng = np.random.default_rng(1)
+    for channels, mode in [(3, "RGB"), (4, "RGBA")]:
+        pixels = rng.integers(0, 256, (37, 23, channels), dtype=np.uint8)
+        file = BytesIO()
+        with PngWriter(file, (23, 37), channels, chunk_size=100) as writer:
+            for top in range(0, 37, 10):
+                writer.write_rows(pixels[top:top + 10])
+
+        image = Image.open(BytesIO(file.getvalue()))
+        assert image.mode == mode, "Invalid mode of PNG"
+        assert (np.array(image) == pixels).all(), "PNG differs from written rows"
+
+
+def test_write_png(tmp_path):
+    path = str(tmp_path / "image.png")
+    pixels = np.full((8, 8, 4), 200, dtype=np.uint8)
+    with write_png(path, (8, 8)) as writer:
+        writer.write_rows(pixels)
+    assert (np.array(Image.open(path)) == pixels).all(), "PNG differs from written rows"
+
+    with pytest.raises(ValueError):
+        with write_png(path, (8, 8)) as writer:
+            writer.write_rows(pixels[:4])
+            raise ValueError("Drawing failed")
+    assert (np.array(Image.open(path)) == pixels).all(), "Failed PNG replaced finished one"
+    assert not (tmp_path / "image.png.tmp").exists(), "Temporary file of failed PNG is left"
@@ -0,0 +1,168 @@
+from random import Random
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance
+from tools import Circle, Color, Rasterizer, Vec2
+from tools.raster import StampCache, EllipseRasterizer, TiledRasterizer
+
+
+def draw_ellipses(draw: ImageDraw.ImageDraw, image_size: tuple[int, int], circle: Circle):
+    """
+    Circle drawn by three ellipses, as Painter draws it
+    """
+    width, height = image_size
+    x, y = circle.pos + Vec2(width // 2, height // 2)
+    if x < 0 or x > width or y < 0 or y > height:
+        return
+    r = abs(circle.radius) + 1
+    x0, y0, x1, y1 = x - r, y - r, x + r, y + r
+
+    color = Color(*circle.color)
+    draw.ellipse((x0 - 2, y0 - 2, x1 - 2, y1 - 2), fill=(color + Color(20, 20, 20)).rgb)
+    draw.ellipse((x0 + 2, y0 + 2, x1 + 2, y1 + 2), fill=(color - Color(20, 20, 20)).rgb)
+    draw.ellipse((x0, y0, x1, y1), fill=color.rgb)
+
+
+def test_rasterizer():
+    rng = Random(1)
+    image_size = (160, 120)
+    circles = [Circle(Vec2(rng.uniform(-90, 90), rng.uniform(-70, 70)),
+                      rng.uniform(-10, 20),
+                      (rng.uniform(-20, 280), rng.uniform(0, 255), rng.uniform(0, 255)))
+               for _ in range(500)]
+
+    image = Image.new("RGBA", image_size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image, "RGBA")
+    for circle in circles:
+        draw_ellipses(draw, image_size, circle)
+
+    rasterizer = Rasterizer(image_size, origin=(80, 60))
+    for i in range(0, len(circles), 50):
+        rasterizer.draw_circles(circles[i:i + 50])
+
+    assert (np.array(image) == rasterizer.buffer).all(), "Rasterizer differs from ellipses"
+    assert (np.array(rasterizer.image()) == rasterizer.buffer).all(), "Invalid image of buffer"
+
+
+def test_stamp_cache():
+    stamps = StampCache(maxsize=2)
+    stamps.get(3, 3)
+    stamps.get(4, 4, uses=5)
+    stamps.get(3, 3)
+    stamps.get(5, 5)
+    assert (stamps.hits, stamps.misses) == (5, 3), "Invalid hit/miss counters"
+    assert list(stamps.stamps) == [(3, 3, 2), (5, 5, 2)], "Least recently used stamp is not evicted"
+    stamps.get(5, 5, offset=4)
+    assert stamps.misses == 4, "Stamp with other bevel offset is shared"
+
+
+def test_dirty_box():
+    rasterizer = Rasterizer((100, 100), origin=(50, 50))
+    rasterizer.take_dirty()
+    rasterizer.draw_circles([Circle(Vec2(10.5, -20.3), 6.7, (10, 200, 30))])
+
+    x0, y0, x1, y1 = rasterizer.take_dirty()
+    rows, cols = np.nonzero(rasterizer.buffer[..., 3])
+    assert x0 <= cols.min() and cols.max() < x1, "Drawn pixels out of dirty box"
+    assert y0 <= rows.min() and rows.max() < y1, "Drawn pixels out of dirty box"
+    assert rasterizer.take_dirty() is None, "Dirty box is not reset"
+
+
+def test_saturation():
+    rng = Random(2)
+    circles = [Circle(Vec2(rng.uniform(-50, 50), rng.uniform(-50, 50)),
+                      rng.uniform(0, 15),
+                      (rng.uniform(0, 255), rng.uniform(0, 255), rng.uniform(0, 255)))
+               for _ in range(200)]
+
+    plain = Rasterizer((100, 100), origin=(50, 50))
+    plain.draw_circles(circles)
+    saturated = Rasterizer((100, 100), origin=(50, 50), saturation=2.0)
+    saturated.draw_circles(circles)
+
+    enhanced = ImageEnhance.Color(plain.image()).enhance(2.0)
+    assert (np.array(enhanced) == saturated.buffer).all(), "Saturation differs from ImageEnhance"
+
+
+def test_scale():
+    circle = Circle(Vec2(0, 0), 10, (100, 150, 200))
+
+    def areas(scale: float) -> np.ndarray:
+        """
+        Areas of circle, its dark and light discs divided by square of scale
+        """
+        size = int(80 * scale)
+        rasterizer = Rasterizer((size, size), origin=(size // 2, size // 2), scale=scale)
+        rasterizer.draw_circles([circle])
+        buffer = rasterizer.buffer
+        return np.array([(buffer[..., 3] > 0).sum(),
+                         (buffer[..., :3] == (120, 170, 220)).all(axis=2).sum(),
+                         (buffer[..., :3] == (80, 130, 180)).all(axis=2).sum()]) / scale ** 2
+
+    # Radius, its pad and bevel are scaled together, so circle keeps its proportions
+    reference = areas(1)
+    for scale in (0.5, 2.5, 4):
+        assert np.allclose(areas(scale), reference, rtol=0.1), f"Circle at scale {scale} has other proportions"
+
+
+def test_ellipse_rasterizer():
+    rng = Random(5)
+    circles = [Circle(Vec2(rng.uniform(-60, 60), rng.uniform(-60, 60)),
+                      rng.uniform(-5, 15),
+                      (rng.uniform(-20, 280), rng.uniform(0, 255), rng.uniform(0, 255)))
+               for _ in range(300)]
+
+    # Offsets of bevel 1 and 5
+    for scale in (0.5, 2.5):
+        size = int(200 * scale)
+        reference = EllipseRasterizer((size, size), origin=(size // 2, size // 2), saturation=2.0, scale=scale)
+        reference.draw_circles(circles)
+        rasterizer = Rasterizer((size, size), origin=(size // 2, size // 2), saturation=2.0, scale=scale)
+        rasterizer.draw_circles(circles)
+
+        assert (np.array(reference.image()) == rasterizer.buffer).all(), f"Backends differ at scale {scale}"
+
+
+def test_window():
+    rng = Random(6)
+    # Some circles are large enough to be drawn without stamps
+    circles = [Circle(Vec2(rng.uniform(-60, 60), rng.uniform(-60, 60)),
+                      rng.uniform(-5, 25) if i % 10 else rng.uniform(-150, 150),
+                      (rng.uniform(0, 255), rng.uniform(0, 255), rng.uniform(0, 255)))
+               for i in range(300)]
+
+    whole = Rasterizer((120, 120), origin=(60, 60))
+    whole.draw_circles(circles)
+    for window in [(0, 0, 50, 40), (50, 40, 120, 120), (7, 93, 61, 120)]:
+        tile = Rasterizer((120, 120), origin=(60, 60), window=window)
+        tile.draw_circles(circles)
+        x0, y0, x1, y1 = window
+        assert (tile.buffer == whole.buffer[y0:y1, x0:x1]).all(), f"Tile {window} differs from image"
+
+
+def test_tiled_rasterizer():
+    rng = Random(8)
+    circles = [Circle(Vec2(rng.uniform(-110, 110), rng.uniform(-110, 110)),
+                      rng.uniform(-5, 30),
+                      (rng.uniform(0, 255), rng.uniform(0, 255), rng.uniform(0, 255)))
+               for _ in range(1000)]
+
+    whole = Rasterizer((200, 180), origin=(100, 90), saturation=2.0)
+    tiled = TiledRasterizer((200, 180), origin=(100, 90), saturation=2.0, tile=64)
+    for i in range(0, len(circles), 300):
+        whole.draw_circles(circles[i:i + 300])
+        tiled.draw_circles(circles[i:i + 300])
+
+    assert (tiled.buffer == whole.buffer).all(), "Tiles differ from image drawn as a whole"
+    box = (30, 40, 170, 100)
+    assert (np.array(tiled.image(box)) == np.array(whole.image(box))).all(), "Invalid box of tiled image"
+    x0, y0, x1, y1 = tiled.take_dirty()
+    rows, cols = np.nonzero(whole.buffer[..., 3])
+    assert x0 <= cols.min() and cols.max() < x1 and y0 <= rows.min() and rows.max() < y1, \
+        "Drawn pixels out of dirty box"
+
+    window = (30, 20, 170, 150)
+    whole = Rasterizer((200, 180), origin=(100, 90), scale=1.5, window=window)
+    tiled = TiledRasterizer((200, 180), origin=(100, 90), scale=1.5, window=window, tile=50)
+    whole.draw_circles(circles)
+    tiled.draw_circles(circles)
+    assert (tiled.buffer == whole.buffer).all(), "Tiles of window differ from window drawn as a whole"
@@ -0,0 +1,35 @@
+from io import StringIO
+from random import Random
+from xml.etree import ElementTree
+from tools import Circle, Rasterizer, Vec2
+from tools.svg import SvgWriter
+
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def test_svg_writer():
+    rng = Random(4)
+    colors = [(rng.uniform(0, 255), rng.uniform(0, 255), rng.uniform(0, 255)) for _ in range(5)]
+    # Runs of 3 circles of the same color
+    circles = [Circle(Vec2(rng.uniform(-40, 40), rng.uniform(-40, 40)), rng.uniform(0, 10), colors[i // 3])
+               for i in range(15)]
+    circles.append(Circle(Vec2(100, 0), 5, colors[0]))  # out of image
+
+    file = StringIO()
+    with SvgWriter(file, (100, 100), origin=(50, 50), saturation=2.0) as writer:
+        writer.draw_circles(iter(circles))
+
+    root = ElementTree.fromstring(file.getvalue())
+    groups = root.findall(f"{SVG}g")
+    assert (writer.circles, writer.groups) == (15, 5), "Invalid counts of circles and groups"
+    assert len(groups) == 5, "Circles of the same color are not grouped"
+    assert all(len(group) == 9 for group in groups), "Circle is not written as three discs"
+
+    # Base color of group is the color of base disc drawn by Rasterizer
+    rasterizer = Rasterizer((100, 100), origin=(50, 50), saturation=2.0)
+    rasterizer.draw_circles(circles[-2:-1])
+    base = groups[-1][-1]
+    x, y = int(float(base.get("cx"))), int(float(base.get("cy")))
+    pixel = "#%02x%02x%02x" % tuple(rasterizer.buffer[y, x, :3].tolist())
+    assert groups[-1].get("fill") == pixel, "Base color differs from Rasterizer"
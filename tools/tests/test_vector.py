@@ -1,4 +1,6 @@
-from tools import Vector
+import pytest
+from tools import Vector, Vec2
+from math import pi, cos, sin
 
 
 def test_vec_operations():
@@ -11,3 +13,29 @@ def test_vec_operations():
     assert v1 * 2 == Vector(2, 4), "Invalid result of mul vector and int"
     assert v1 / 3  == Vector(1/3, 2/3), "Invalid result of div vector by int"
     
+
+def test_vec2_operations():
+    v1 = Vec2(1, 2)
+    v2 = Vec2(2, 3)
+
+    assert v1 + v2 == Vec2(3, 5), "Invalid result of add vectors"
+    assert v1 - v2 == Vec2(-1, -1), "Invalid result of sub vectors"
+    assert 2 * v1 == Vec2(2, 4), "Invalid result of mul vector and int"
+    assert v1 / 2 == Vec2(0.5, 1), "Invalid result of div vector by int"
+    assert v1 + Vector(1, 1) == Vec2(2, 3), "Invalid result of add Vector to Vec2"
+    assert Vec2(3, 4).ort == Vec2(0.6, 0.8), "Invalid ort of vector"
+
+    a = pi / 3
+    r1 = v1.rotate(a)
+    r2 = v1.rotate(cos_a=cos(a), sin_a=sin(a))
+    assert r1 == r2, "Invalid rotation by precomputed cos and sin"
+
+
+def test_vec2_immutable():
+    v = Vec2(1, 2)
+    with pytest.raises(AttributeError):
+        v.x = 3
+    assert v == Vec2(1, 2), "Vec2 is changed"
+
+    with pytest.raises(ValueError):
+        Vec2("1", 2)
@@ -1,5 +1,6 @@
 from .color import Color
 from .vector import Vector, Vec2, Vec3
 from .circle import Circle
+from .raster import Rasterizer, EllipseRasterizer, TiledRasterizer
 from . import planticus
 
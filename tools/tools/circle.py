@@ -11,14 +11,14 @@ from dataclasses import dataclass
 class Circle:
     pos: Vec2
     radius: float
-    color: Color
+    color: tuple[float, float, float] # packed (red, green, blue), use Color(*color) for operations
 
     @staticmethod
     def random() -> Circle:
         return Circle(
             Vec2.random(),
             randint(10, 20),
-            Color.random()
+            Color.random().rgb
         )
 
     def __repr__(self) -> str:
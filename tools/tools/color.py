@@ -1,5 +1,6 @@
 from __future__ import annotations
-from random import randint
+import random
+from random import Random
 
 
 class Color:
@@ -20,11 +21,12 @@ class Color:
             return value
 
     @staticmethod
-    def random() -> Color:
+    def random(rng: Random = None) -> Color:
+        rng = rng if rng is not None else random
         return Color(
-            randint(0, 255),
-            randint(0, 255),
-            randint(0, 255)
+            rng.randint(0, 255),
+            rng.randint(0, 255),
+            rng.randint(0, 255)
         ) 
 
     def __iter__(self):
@@ -0,0 +1,129 @@
+from __future__ import annotations
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Color type of PNG by count of channels
+COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+
+class PngWriter:
+    """
+    Writes PNG file band by band, image is never kept in memory
+
+    Rows are filtered by `Sub` filter and compressed
+    as they come, compressed data is written in chunks
+    """
+    def __init__(self,
+                 file: BinaryIO,
+                 size: tuple[int, int],
+                 channels: int = 4,
+                 level: int = 6,
+                 chunk_size: int = 1 << 20):
+        """
+        :param file: Binary file to write to
+        :param size: Size of image (width, height)
+        :param channels: Count of channels (1 gray, 2 gray with alpha, 3 RGB, 4 RGBA)
+        :param level: Level of zlib compression
+        :param chunk_size: Size of IDAT chunks
+        """
+        self.file = file
+        self.size = size
+        self.channels = channels
+        self.chunk_size = chunk_size
+        self.compressor = zlib.compressobj(level)
+        self.pending = bytearray()
+        self.rows = 0
+
+        width, height = size
+        file.write(PNG_SIGNATURE)
+        self.write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8,
+                                               COLOR_TYPES[channels], 0, 0, 0))
+
+    def __enter__(self) -> PngWriter:
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+
+    def write_chunk(self, kind: bytes, data: bytes):
+        self.file.write(struct.pack(">I", len(data)))
+        self.file.write(kind)
+        self.file.write(data)
+        self.file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    def write_rows(self, rows: np.ndarray):
+        """
+        Write next rows of image
+
+        :param rows: uint8 array (count of rows, width, channels)
+        """
+        width, height = self.size
+        if rows.shape[1:] != (width, self.channels) or rows.dtype != np.uint8:
+            raise ValueError(f"Rows of shape {rows.shape} ({rows.dtype}) don't fit PNG {self.size}")
+        if self.rows + len(rows) > height:
+            raise ValueError("Too many rows written to PNG")
+
+        # Sub filter: every byte minus the same byte of previous pixel
+        flat = rows.reshape(len(rows), -1)
+        filtered = np.empty((len(rows), flat.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:self.channels + 1] = flat[:, :self.channels]
+        np.subtract(flat[:, self.channels:], flat[:, :-self.channels], out=filtered[:, self.channels + 1:])
+
+        self.pending += self.compressor.compress(filtered.tobytes())
+        self.rows += len(rows)
+        while len(self.pending) >= self.chunk_size:
+            self.write_chunk(b"IDAT", bytes(self.pending[:self.chunk_size]))
+            del self.pending[:self.chunk_size]
+
+    def close(self):
+        """
+        Finish PNG (file itself stays open)
+        """
+        if self.rows != self.size[1]:
+            raise ValueError(f"PNG has {self.rows} of {self.size[1]} rows")
+        self.pending += self.compressor.flush()
+        if self.pending:
+            self.write_chunk(b"IDAT", bytes(self.pending))
+        self.write_chunk(b"IEND", b"")
+        logger.info(f"Written PNG {self.size}")
+
+
+@contextmanager
+def write_png(path: str,
+              size: tuple[int, int],
+              channels: int = 4,
+              level: int = 6) -> Iterator[PngWriter]:
+    """
+    Write PNG file by `PngWriter`
+
+    PNG is written to temporary file next to path, which replaces
+    the file only when PNG is finished, so an error never leaves
+    a truncated image at path
+
+    :param path: Path of PNG file
+    :param size: Size of image (width, height)
+    :param channels: Count of channels
+    :param level: Level of zlib compression
+    """
+    temporary = path + ".tmp"
+    try:
+        with open(temporary, "wb") as file:
+            with PngWriter(file, size, channels, level) as png:
+                yield png
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
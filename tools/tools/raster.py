@@ -0,0 +1,691 @@
+from __future__ import annotations
+import logging
+logger = logging.getLogger(__name__)
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from math import floor, ceil
+from threading import Lock
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance
+
+from tools.circle import Circle
+
+
+# Dark and light discs of circle are shifted by this offset
+# and radius of circle is padded by this pad (at scale 1)
+BEVEL_OFFSET = 2
+RADIUS_PAD = 1
+# Difference of color of dark and light discs
+BEVEL_SHADE = 20
+# Circles with larger box are drawn by their own masks instead of stamps,
+# so stamps stay small when circles are scaled to poster resolution
+LARGE_BOX = 256
+
+# Footprint is rows, columns and labels of pixels relative to box corner
+Footprint = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def bevel_offset(scale: float) -> int:
+    """
+    Offset of dark and light discs of circle drawn at given scale,
+    rounded to whole pixels, so all discs of circle share one stamp
+    """
+    return round(BEVEL_OFFSET * scale)
+
+
+@lru_cache(maxsize=1024)
+def disc_footprint(width: int, height: int) -> Footprint:
+    """
+    Pixels of disc with bounding box of given size, same pixels
+    as `ImageDraw.ellipse` fills for box (0, 0, width, height),
+    all labeled 0
+    """
+    mask = Image.new("1", (width + 1, height + 1), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, width, height), fill=1)
+    rows, cols = np.nonzero(np.array(mask))
+    return rows, cols, np.zeros(len(rows), dtype=np.int64)
+
+
+def bevel_footprint(width: int, height: int, offset: int = BEVEL_OFFSET) -> Footprint:
+    """
+    Pixels of circle with bevel: dark, light and base discs with
+    bounding box of given size, shifted by -offset, offset and 0.
+    Box of the whole stamp starts at box of dark disc
+
+    Every pixel is labeled by the last disc that covers it:
+    0 (dark), 1 (light) or 2 (base)
+    """
+    size = 2 * offset
+    labels = np.full((height + size + 1, width + size + 1), -1)
+    for label, shift in enumerate((0, size, offset)):
+        rows, cols, _ = disc_footprint(width, height)
+        labels[rows + shift, cols + shift] = label
+    rows, cols = np.nonzero(labels >= 0)
+    return rows, cols, labels[rows, cols]
+
+
+@lru_cache(maxsize=16)
+def saturation_table(factor: float) -> np.ndarray:
+    """
+    Lookup of `ImageEnhance.Color(image).enhance(factor)`,
+    enhanced channel of color is table[gray, channel]
+    where gray is gray level of the color
+    """
+    gray = np.arange(256, dtype=np.float32)[:, None]
+    channel = np.arange(256, dtype=np.float32)[None, :]
+    return np.clip(gray + np.float32(factor) * (channel - gray), 0, 255).astype(np.uint32)
+
+
+def saturate(color: np.ndarray, factor: float) -> np.ndarray:
+    """
+    Enhance integer colors (n, 3) the same way as `ImageEnhance.Color`
+    """
+    red, green, blue = color[:, 0], color[:, 1], color[:, 2]
+    # Gray level as in Image.convert("L")
+    gray = (red * 19595 + green * 38470 + blue * 7471 + 0x8000) >> 16
+    return saturation_table(factor)[gray[:, None], color]
+
+
+def union_box(box1: tuple[int, int, int, int] | None,
+              box2: tuple[int, int, int, int] | None) -> tuple[int, int, int, int] | None:
+    """
+    Smallest box (left, top, right, bottom) containing both boxes,
+    None stands for empty box
+    """
+    if box1 is None:
+        return box2
+    if box2 is None:
+        return box1
+    return (min(box1[0], box2[0]), min(box1[1], box2[1]),
+            max(box1[2], box2[2]), max(box1[3], box2[3]))
+
+
+class StampCache:
+    """
+    Bounded LRU cache of bevel stamps keyed by size of disc box
+    and offset of bevel
+
+    Size of box is the radius of circle quantized together with its
+    sub-pixel offset, so plants with radii from a small range use
+    only a few stamps. Shared by all Rasterizers of process
+    """
+    def __init__(self, maxsize: int = 256):
+        """
+        :param maxsize: Greatest count of stamps kept
+        """
+        self.maxsize = maxsize
+        self.stamps = OrderedDict()
+        self.lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, width: int, height: int, uses: int = 1, offset: int = BEVEL_OFFSET) -> Footprint:
+        """
+        Return stamp for disc box of given size
+
+        :param uses: Count of circles drawn with stamp
+        :param offset: Offset of bevel
+        """
+        key = (width, height, offset)
+        with self.lock:
+            stamp = self.stamps.get(key)
+            if stamp is not None:
+                self.stamps.move_to_end(key)
+                self.hits += uses
+                return stamp
+
+        stamp = bevel_footprint(width, height, offset)
+
+        with self.lock:
+            self.misses += 1
+            self.hits += uses - 1
+            self.stamps[key] = stamp
+            if len(self.stamps) > self.maxsize:
+                evicted, _ = self.stamps.popitem(last=False)
+                logger.debug(f"Evicted stamp {evicted} from {self}")
+        return stamp
+
+    def clear(self):
+        with self.lock:
+            self.stamps.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.stamps)
+
+    def __repr__(self) -> str:
+        return f"StampCache(stamps={len(self)}/{self.maxsize}, hits={self.hits}, misses={self.misses})"
+
+
+# Cache of stamps shared by Painter and gallery renderer
+STAMPS = StampCache()
+
+# Thread pool shared by TiledRasterizers, created when first needed
+_executor = None
+_executor_lock = Lock()
+
+
+def tile_executor() -> ThreadPoolExecutor:
+    """
+    Return thread pool of TiledRasterizers (one thread per core)
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                           thread_name_prefix="raster")
+        return _executor
+
+
+class Rasterizer:
+    """
+    Draws batches of circles with bevel (dark, light and base discs)
+    into RGBA buffer, circles are drawn in the given order
+
+    Every circle looks the same as drawn by three `ImageDraw.ellipse`
+    calls, but whole batch is drawn by a few vectorized operations:
+    every pixel gets color of the last disc that covers it
+    """
+    def __init__(self,
+                 image_size: tuple[int, int],
+                 origin: tuple[float, float] = (0, 0),
+                 stamps: StampCache = STAMPS,
+                 saturation: float = None,
+                 scale: float = 1.0,
+                 window: tuple[int, int, int, int] = None):
+        """
+        :param image_size: Size of image (width, height)
+        :param origin: Position in image of origin of circles coordinates
+        :param stamps: Cache of bevel stamps (shared by default)
+        :param saturation: If given, colors of circles are enhanced when
+                           drawn, so buffer is the same as enhanced by
+                           `ImageEnhance.Color(image).enhance(saturation)`
+        :param scale: Scale of circles (positions, radii, pad of radii
+                      and offset of bevel), so the same circles may be
+                      drawn at preview or poster resolution
+        :param window: (left, top, right, bottom) box of image kept in buffer
+                       (whole image if not given), so a large image may be
+                       drawn tile by tile, buffer is the same as this box
+                       of the whole image
+        """
+        self.image_size = image_size
+        self.origin = origin
+        self.scale = scale
+        self.offset = bevel_offset(scale)
+        self.stamps = stamps
+        self.saturation = saturation
+        self.window = window if window is not None else (0, 0, *image_size)
+        left, top, right, bottom = self.window
+        width, height = self.size = (right - left, bottom - top)
+
+        self.buffer = np.zeros((height, width, 4), dtype=np.uint8)
+        # Pixels of buffer packed as RGBA words
+        self.pixels = self.buffer.reshape(-1).view("<u4")
+
+        # Index of the last disc that covers pixel, -1 between batches
+        self.winner = np.full(width * height, -1, dtype=np.int64)
+
+        # Box of pixels changed since last `take_dirty`
+        self.dirty = None
+        self.dirty_lock = Lock()
+
+    def clear(self):
+        """
+        Make buffer transparent
+        """
+        self.buffer[:] = 0
+        self.mark_dirty((0, 0, *self.size))
+
+    def image(self, box: tuple[int, int, int, int] = None) -> Image.Image:
+        """
+        Return copy of buffer (or of its box) as image
+
+        :param box: (left, top, right, bottom) box of buffer
+        """
+        buffer = self.buffer
+        if box is not None:
+            x0, y0, x1, y1 = box
+            buffer = buffer[y0:y1, x0:x1]
+        return Image.fromarray(buffer, "RGBA").copy()
+
+    def mark_dirty(self, box: tuple[int, int, int, int]):
+        """
+        Add box (left, top, right, bottom) to changed region of buffer
+        """
+        with self.dirty_lock:
+            self.dirty = union_box(self.dirty, box)
+
+    def take_dirty(self) -> tuple[int, int, int, int] | None:
+        """
+        Return box of buffer changed since previous call (None if nothing
+        changed) and start tracking changes again
+        """
+        with self.dirty_lock:
+            dirty, self.dirty = self.dirty, None
+        return dirty
+
+    def draw_circles(self, circles: list[Circle]):
+        """
+        Draw list of circles
+        """
+        values = np.array([(c.pos.x, c.pos.y, c.radius, *c.color) for c in circles],
+                          dtype=float).reshape(-1, 6)
+        self.draw(values[:, 0], values[:, 1], values[:, 2], values[:, 3:])
+
+    def draw(self,
+             x: np.ndarray,
+             y: np.ndarray,
+             radius: np.ndarray,
+             color: np.ndarray):
+        """
+        Draw batch of circles, circles with center out of image
+        (or that don't reach window of buffer) are skipped
+
+        :param x: x of centers (n,)
+        :param y: y of centers (n,)
+        :param radius: radii (n,)
+        :param color: colors (red, green, blue) (n, 3)
+        """
+        image_width, image_height = self.image_size
+        left, top, right, bottom = self.window
+        width, height = self.size
+        if self.scale != 1:
+            x, y, radius = x * self.scale, y * self.scale, radius * self.scale
+        x = x + self.origin[0]
+        y = y + self.origin[1]
+        r = np.abs(radius) + RADIUS_PAD * self.scale
+        # Discs of circle lie within offset of bevel of its box
+        margin = r + self.offset + 1
+
+        inside = (x >= 0) & (x <= image_width) & (y >= 0) & (y <= image_height)
+        if self.window != (0, 0, image_width, image_height):
+            inside &= ((x + margin >= left) & (x - margin < right)
+                       & (y + margin >= top) & (y - margin < bottom))
+        if not inside.all():
+            x, y, r, margin, color = x[inside], y[inside], r[inside], margin[inside], color[inside]
+        if not len(x):
+            return
+
+        color = np.clip(color, 0, 255)
+
+        self.mark_dirty((max(int(np.floor((x - margin).min())) - left, 0),
+                         max(int(np.floor((y - margin).min())) - top, 0),
+                         min(int(np.ceil((x + margin).max())) + 1 - left, width),
+                         min(int(np.ceil((y + margin).max())) + 1 - top, height)))
+
+        # Discs of every circle in draw order: dark, light, base
+        shades = np.array([BEVEL_SHADE, -BEVEL_SHADE, 0])
+        disc_color = np.trunc(np.clip(color[:, None] + shades[:, None], 0, 255))
+        disc_color = disc_color.reshape(-1, 3).astype(np.uint32)
+        if self.saturation is not None:
+            disc_color = saturate(disc_color, self.saturation)
+        packed = (disc_color[:, 0] | disc_color[:, 1] << 8 | disc_color[:, 2] << 16
+                  | np.uint32(255) << 24)
+
+        large = 2 * r > LARGE_BOX
+        if not large.any():
+            self.draw_batch(x, y, r, packed)
+            return
+
+        # Large circles are drawn one by one between batches of the others
+        start = 0
+        for i in np.flatnonzero(large).tolist():
+            if start < i:
+                self.draw_batch(x[start:i], y[start:i], r[start:i], packed[3 * start:3 * i])
+            self.draw_large(x[i], y[i], r[i], packed[3 * i:3 * i + 3])
+            start = i + 1
+        if start < len(x):
+            self.draw_batch(x[start:], y[start:], r[start:], packed[3 * start:])
+
+    def draw_batch(self, x: np.ndarray, y: np.ndarray, r: np.ndarray, packed: np.ndarray):
+        """
+        Draw batch of circles given in image coordinates
+
+        :param r: radii of boxes of circles
+        :param packed: packed colors of discs of circles (3n,)
+        """
+        left, top = self.window[:2]
+        d = self.offset
+        first_disc = 3 * np.arange(len(x))
+
+        # Right of origin box corners are truncated the same way as floored,
+        # so all three discs of circle have the same box and circle is one stamp
+        stamped = (x - r - d >= 0) & (y - r - d >= 0)
+        x0 = np.floor(x[stamped] - r[stamped]).astype(np.int64)
+        y0 = np.floor(y[stamped] - r[stamped]).astype(np.int64)
+        pixels, discs = self.cover(x0 - d - left, y0 - d - top,
+                                   np.floor(x[stamped] + r[stamped]).astype(np.int64) - x0,
+                                   np.floor(y[stamped] + r[stamped]).astype(np.int64) - y0,
+                                   first_disc[stamped],
+                                   lambda w, h, uses: self.stamps.get(w, h, uses, d))
+
+        if not stamped.all():
+            # Near top and left edges every disc is drawn by itself
+            rest = ~stamped
+            offsets = np.array([-d, d, 0])
+            x0 = np.trunc((x[rest] - r[rest])[:, None] + offsets).astype(np.int64).ravel()
+            y0 = np.trunc((y[rest] - r[rest])[:, None] + offsets).astype(np.int64).ravel()
+            x1 = np.trunc((x[rest] + r[rest])[:, None] + offsets).astype(np.int64).ravel()
+            y1 = np.trunc((y[rest] + r[rest])[:, None] + offsets).astype(np.int64).ravel()
+            rest_discs = (first_disc[rest][:, None] + np.arange(3)).ravel()
+            rest_pixels, rest_discs = self.cover(x0 - left, y0 - top, x1 - x0, y1 - y0, rest_discs,
+                                                 lambda w, h, uses: disc_footprint(w, h))
+            pixels = np.concatenate([pixels, rest_pixels])
+            discs = np.concatenate([discs, rest_discs])
+
+        # The last disc that covers pixel wins, as if discs were drawn one by one
+        np.maximum.at(self.winner, pixels, discs)
+        wins = self.winner[pixels] == discs
+        self.pixels[pixels[wins]] = packed[discs[wins]]
+        self.winner[pixels] = -1
+
+    def draw_large(self, x: float, y: float, r: float, packed: np.ndarray):
+        """
+        Draw one large circle given in image coordinates by masks
+        of its discs, masks cover only the part of window under circle
+
+        :param packed: packed colors of dark, light and base discs
+        """
+        left, top, right, bottom = self.window
+        d = self.offset
+        offsets = (-d, d, 0)
+        if x - r - d >= 0 and y - r - d >= 0:
+            # Same boxes as of stamp
+            x0, y0, x1, y1 = floor(x - r), floor(y - r), floor(x + r), floor(y + r)
+            boxes = [(x0 + d, y0 + d, x1 + d, y1 + d) for d in offsets]
+        else:
+            boxes = [(int(x - r + d), int(y - r + d), int(x + r + d), int(y + r + d)) for d in offsets]
+
+        # Part of window covered by circle
+        mx0 = max(min(box[0] for box in boxes), left)
+        my0 = max(min(box[1] for box in boxes), top)
+        mx1 = min(max(box[2] for box in boxes) + 1, right)
+        my1 = min(max(box[3] for box in boxes) + 1, bottom)
+        if mx0 >= mx1 or my0 >= my1:
+            return
+
+        region = self.pixels.reshape(self.size[1], self.size[0])[my0 - top:my1 - top, mx0 - left:mx1 - left]
+        for (bx0, by0, bx1, by1), color in zip(boxes, packed.tolist()):
+            mask = Image.new("1", (mx1 - mx0, my1 - my0), 0)
+            ImageDraw.Draw(mask).ellipse((bx0 - mx0, by0 - my0, bx1 - mx0, by1 - my0), fill=1)
+            region[np.array(mask)] = color
+
+    def cover(self,
+              x0: np.ndarray,
+              y0: np.ndarray,
+              width: np.ndarray,
+              height: np.ndarray,
+              first_disc: np.ndarray,
+              footprint) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Pixels covered by footprints placed at given corners
+
+        :param x0, y0: corners of footprints in buffer
+        :param width, height: sizes of disc boxes of footprints
+        :param first_disc: index of the first disc of every footprint,
+                           label of pixel is added to it
+        :param footprint: function (width, height, uses) -> Footprint
+        :return: flat indices of pixels in image and index of disc
+                 for every covered pixel
+        """
+        image_width, image_height = self.size
+        if not len(x0):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        # Boxes with the same size share footprint, footprints used
+        # by batch are put one after another
+        key = width * (height.max() + 1) + height
+        first, group = np.unique(key, return_index=True, return_inverse=True)[1:]
+        group = group.ravel()
+        uses = np.bincount(group)
+        prints = [footprint(int(width[i]), int(height[i]), int(n))
+                  for i, n in zip(first.tolist(), uses.tolist())]
+        rows, cols, labels = (np.concatenate(values) for values in zip(*prints))
+        lengths = np.array([len(rows) for rows, _, _ in prints])
+        starts = np.cumsum(lengths) - lengths
+
+        # Every item covers pixels of its footprint
+        count = lengths[group]
+        item = np.repeat(np.arange(len(x0)), count)
+        index = np.arange(len(item)) + np.repeat(starts[group] - (np.cumsum(count) - count), count)
+
+        px = x0[item] + cols[index]
+        py = y0[item] + rows[index]
+        discs = first_disc[item] + labels[index]
+
+        if px.min() < 0 or py.min() < 0 or px.max() >= image_width or py.max() >= image_height:
+            inside = (px >= 0) & (px < image_width) & (py >= 0) & (py < image_height)
+            px, py, discs = px[inside], py[inside], discs[inside]
+
+        return py * image_width + px, discs
+
+
+class EllipseRasterizer:
+    """
+    Reference backend with the same interface as `Rasterizer`: draws
+    every disc by `ImageDraw.ellipse` one by one and enhances colors
+    by `ImageEnhance.Color` when image is taken. Much slower, but
+    doesn't depend on NumPy tricks, so it checks other backends
+    """
+    def __init__(self,
+                 image_size: tuple[int, int],
+                 origin: tuple[float, float] = (0, 0),
+                 stamps: StampCache = STAMPS,
+                 saturation: float = None,
+                 scale: float = 1.0):
+        """
+        Parameters are the same as of `Rasterizer` (`stamps` is unused)
+        """
+        self.image_size = image_size
+        self.origin = origin
+        self.stamps = stamps
+        self.saturation = saturation
+        self.scale = scale
+        self.offset = bevel_offset(scale)
+
+        self.canvas = Image.new("RGBA", image_size, (0, 0, 0, 0))
+        self.drawer = ImageDraw.Draw(self.canvas, "RGBA")
+
+        self.dirty = None
+        self.dirty_lock = Lock()
+
+    def clear(self):
+        self.drawer.rectangle((0, 0, *self.image_size), fill=(0, 0, 0, 0))
+        self.mark_dirty((0, 0, *self.image_size))
+
+    def image(self, box: tuple[int, int, int, int] = None) -> Image.Image:
+        image = self.canvas.crop(box) if box is not None else self.canvas.copy()
+        if self.saturation is not None:
+            image = ImageEnhance.Color(image).enhance(self.saturation)
+        return image
+
+    def mark_dirty(self, box: tuple[int, int, int, int]):
+        with self.dirty_lock:
+            self.dirty = union_box(self.dirty, box)
+
+    def take_dirty(self) -> tuple[int, int, int, int] | None:
+        with self.dirty_lock:
+            dirty, self.dirty = self.dirty, None
+        return dirty
+
+    def draw_circles(self, circles: list[Circle]):
+        for circle in circles:
+            self.draw_circle(circle.pos.x, circle.pos.y, circle.radius, circle.color)
+
+    def draw(self,
+             x: np.ndarray,
+             y: np.ndarray,
+             radius: np.ndarray,
+             color: np.ndarray):
+        for args in zip(x.tolist(), y.tolist(), radius.tolist(), color.tolist()):
+            self.draw_circle(*args)
+
+    def draw_circle(self, x: float, y: float, radius: float, color: tuple[float, float, float]):
+        """
+        Draw one circle by three ellipses
+        """
+        width, height = self.image_size
+        x = x * self.scale + self.origin[0]
+        y = y * self.scale + self.origin[1]
+        if x < 0 or x > width or y < 0 or y > height:
+            return
+
+        r = abs(radius * self.scale) + RADIUS_PAD * self.scale
+        x0, y0, x1, y1 = x - r, y - r, x + r, y + r
+        d = self.offset
+        margin = d + 1
+        self.mark_dirty((max(floor(x0) - margin, 0), max(floor(y0) - margin, 0),
+                         min(ceil(x1) + margin + 1, width), min(ceil(y1) + margin + 1, height)))
+
+        base = [min(max(c, 0), 255) for c in color]
+        for offset, shade in ((-d, BEVEL_SHADE), (d, -BEVEL_SHADE), (0, 0)):
+            fill = tuple(int(min(max(c + shade, 0), 255)) for c in base)
+            self.drawer.ellipse((x0 + offset, y0 + offset, x1 + offset, y1 + offset), fill=fill)
+
+
+class TiledRasterizer:
+    """
+    Backend with the same interface as `Rasterizer` that splits image
+    into tiles, every tile is drawn by its own `Rasterizer` (window)
+
+    Every batch of circles is binned into tiles the circles overlap and
+    tiles are drawn in shared thread pool, NumPy releases GIL in its inner
+    loops, so tiles are drawn on all cores. Circles are drawn into every
+    tile in the given order, so image is the same as drawn by `Rasterizer`
+    """
+    # Batches with fewer circles (and all batches on one core) are drawn in calling thread
+    PARALLEL_CIRCLES = 256
+
+    def __init__(self,
+                 image_size: tuple[int, int],
+                 origin: tuple[float, float] = (0, 0),
+                 stamps: StampCache = STAMPS,
+                 saturation: float = None,
+                 scale: float = 1.0,
+                 window: tuple[int, int, int, int] = None,
+                 tile: int = None):
+        """
+        Parameters are the same as of `Rasterizer`
+
+        :param tile: Size of tile, by default image is split
+                     into about two tiles per core
+        """
+        self.image_size = image_size
+        self.origin = origin
+        self.stamps = stamps
+        self.saturation = saturation
+        self.scale = scale
+        self.window = window if window is not None else (0, 0, *image_size)
+        left, top, right, bottom = self.window
+        self.size = (right - left, bottom - top)
+        if tile is None:
+            cores = os.cpu_count() or 1
+            tile = max(ceil((self.size[0] * self.size[1] / (2 * cores)) ** 0.5), 1)
+
+        self.tile = tile
+        self.columns, self.rows = -(-self.size[0] // tile), -(-self.size[1] // tile)
+        self.tiles = [Rasterizer(image_size, origin, stamps, saturation, scale,
+                                 window=(x0, y0, min(x0 + tile, right), min(y0 + tile, bottom)))
+                      for y0 in range(top, bottom, tile)
+                      for x0 in range(left, right, tile)]
+
+    @property
+    def buffer(self) -> np.ndarray:
+        """
+        Copy of whole buffer assembled from tiles
+        """
+        return np.asarray(self.image())
+
+    def clear(self):
+        for tile in self.tiles:
+            tile.clear()
+
+    def image(self, box: tuple[int, int, int, int] = None) -> Image.Image:
+        """
+        Return image of buffer (or of its box) assembled from tiles
+
+        :param box: (left, top, right, bottom) box of buffer
+        """
+        left, top = self.window[:2]
+        x0, y0, x1, y1 = box if box is not None else (0, 0, *self.size)
+        buffer = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+        for tile in self.tiles:
+            tx0, ty0, tx1, ty1 = tile.window
+            tx0, ty0, tx1, ty1 = tx0 - left, ty0 - top, tx1 - left, ty1 - top
+            ix0, iy0, ix1, iy1 = max(tx0, x0), max(ty0, y0), min(tx1, x1), min(ty1, y1)
+            if ix0 < ix1 and iy0 < iy1:
+                buffer[iy0 - y0:iy1 - y0, ix0 - x0:ix1 - x0] = \
+                    tile.buffer[iy0 - ty0:iy1 - ty0, ix0 - tx0:ix1 - tx0]
+        return Image.fromarray(buffer, "RGBA")
+
+    def take_dirty(self) -> tuple[int, int, int, int] | None:
+        """
+        Return box of buffer changed since previous call (union of
+        changed boxes of tiles)
+        """
+        left, top = self.window[:2]
+        dirty = None
+        for tile in self.tiles:
+            box = tile.take_dirty()
+            if box is not None:
+                dx, dy = tile.window[0] - left, tile.window[1] - top
+                dirty = union_box(dirty, (box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy))
+        return dirty
+
+    def draw_circles(self, circles: list[Circle]):
+        """
+        Draw list of circles
+        """
+        values = np.array([(c.pos.x, c.pos.y, c.radius, *c.color) for c in circles],
+                          dtype=float).reshape(-1, 6)
+        self.draw(values[:, 0], values[:, 1], values[:, 2], values[:, 3:])
+
+    def draw(self,
+             x: np.ndarray,
+             y: np.ndarray,
+             radius: np.ndarray,
+             color: np.ndarray):
+        """
+        Draw batch of circles into tiles they overlap
+        """
+        cx = x * self.scale + self.origin[0]
+        cy = y * self.scale + self.origin[1]
+        margin = np.abs(radius * self.scale) + RADIUS_PAD * self.scale + bevel_offset(self.scale) + 1
+
+        # Circles overlapping window are binned into tiles at once: every circle
+        # is repeated for every tile of its box, stable sort by tile keeps draw order
+        left, top, right, bottom = self.window
+        index = np.flatnonzero((cx + margin >= left) & (cx - margin < right)
+                               & (cy + margin >= top) & (cy - margin < bottom))
+        c0 = np.clip((cx[index] - margin[index] - left) // self.tile, 0, self.columns - 1).astype(np.int64)
+        c1 = np.clip((cx[index] + margin[index] - left) // self.tile, 0, self.columns - 1).astype(np.int64)
+        r0 = np.clip((cy[index] - margin[index] - top) // self.tile, 0, self.rows - 1).astype(np.int64)
+        r1 = np.clip((cy[index] + margin[index] - top) // self.tile, 0, self.rows - 1).astype(np.int64)
+        spans = c1 - c0 + 1
+        count = spans * (r1 - r0 + 1)
+        item = np.repeat(np.arange(len(index)), count)
+        k = np.arange(len(item)) - np.repeat(np.cumsum(count) - count, count)
+        tile_id = (r0[item] + k // spans[item]) * self.columns + c0[item] + k % spans[item]
+        order = np.argsort(tile_id, kind="stable")
+        bucket = index[item[order]]
+        bounds = np.searchsorted(tile_id[order], np.arange(len(self.tiles) + 1))
+
+        jobs = [(tile, bucket[bounds[i]:bounds[i + 1]])
+                for i, tile in enumerate(self.tiles) if bounds[i] < bounds[i + 1]]
+
+        def draw_tile(job):
+            tile, circles = job
+            tile.draw(x[circles], y[circles], radius[circles], color[circles])
+
+        if len(jobs) > 1 and len(x) >= self.PARALLEL_CIRCLES and (os.cpu_count() or 1) > 1:
+            # Raise exception of any tile
+            for _ in tile_executor().map(draw_tile, jobs):
+                pass
+        else:
+            for job in jobs:
+                draw_tile(job)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+import logging
+logger = logging.getLogger(__name__)
+
+import base64
+from io import BytesIO
+from typing import Iterable, TextIO
+
+import numpy as np
+from PIL import Image
+
+from tools.circle import Circle
+from tools.raster import BEVEL_SHADE, RADIUS_PAD, bevel_offset, saturation_table
+
+
+class SvgWriter:
+    """
+    Writes circles with bevel (dark, light and base discs) to SVG file
+    as they come, circles are never collected in memory
+
+    Circles look the same as drawn by `Rasterizer` with the same
+    parameters, but at any resolution. Consecutive circles of the same
+    drawn color share a group that holds their base color, so only
+    shifted dark and light discs repeat their color
+    """
+    def __init__(self,
+                 file: TextIO,
+                 image_size: tuple[int, int],
+                 origin: tuple[float, float] = (0, 0),
+                 saturation: float = None,
+                 scale: float = 1.0,
+                 background: Image.Image = None,
+                 precision: int = 2):
+        """
+        :param file: Text file to write to
+        :param image_size: Size of image (width, height)
+        :param origin: Position in image of origin of circles coordinates
+        :param saturation: If given, colors of circles are enhanced
+                           the same way as by `Rasterizer`
+        :param scale: Scale of circles (positions, radii, pad of radii
+                      and offset of bevel)
+        :param background: Image embedded under circles (as PNG)
+        :param precision: Count of decimals of coordinates
+        """
+        self.file = file
+        self.image_size = image_size
+        self.origin = origin
+        self.saturation = saturation
+        self.scale = scale
+        self.offset = bevel_offset(scale)
+        self.precision = precision
+        self.table = saturation_table(saturation).tolist() if saturation is not None else None
+
+        # Disc colors of current group of circles and count of written circles and groups
+        self.color = None
+        self.circles = 0
+        self.groups = 0
+
+        width, height = image_size
+        file.write(f'<svg xmlns="http://www.w3.org/2000/svg" '
+                   f'xmlns:xlink="http://www.w3.org/1999/xlink" '
+                   f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">\n')
+        if background is not None:
+            self.write_image(background)
+
+    def __enter__(self) -> SvgWriter:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_image(self, image: Image.Image):
+        """
+        Embed image stretched over whole SVG
+        """
+        buffer = BytesIO()
+        image.save(buffer, "PNG")
+        data = base64.b64encode(buffer.getvalue()).decode("ascii")
+        width, height = self.image_size
+        self.file.write(f'<image width="{width}" height="{height}" preserveAspectRatio="none" '
+                        f'xlink:href="data:image/png;base64,{data}"/>\n')
+
+    def disc_colors(self, color: tuple[float, float, float]) -> tuple[str, str, str]:
+        """
+        Hex colors of dark, light and base discs of circle,
+        same as `Rasterizer` draws them
+        """
+        color = [min(max(c, 0), 255) for c in color]
+        discs = []
+        for shade in (BEVEL_SHADE, -BEVEL_SHADE, 0):
+            red, green, blue = (int(min(max(c + shade, 0), 255)) for c in color)
+            if self.table is not None:
+                # Gray level as in Image.convert("L")
+                gray = self.table[(red * 19595 + green * 38470 + blue * 7471 + 0x8000) >> 16]
+                red, green, blue = gray[red], gray[green], gray[blue]
+            discs.append(f"#{red:02x}{green:02x}{blue:02x}")
+        return tuple(discs)
+
+    def draw_circles(self, circles: Iterable[Circle]):
+        """
+        Write circles, `circles` may be any iterable (e.g. `Plant.get_circles()`)
+        """
+        for circle in circles:
+            self.draw_circle(circle.pos.x, circle.pos.y, circle.radius, circle.color)
+
+    def draw(self,
+             x: np.ndarray,
+             y: np.ndarray,
+             radius: np.ndarray,
+             color: np.ndarray):
+        """
+        Write batch of circles given by arrays as `Rasterizer.draw`
+        """
+        for args in zip(x.tolist(), y.tolist(), radius.tolist(), color.tolist()):
+            self.draw_circle(*args)
+
+    def draw_circle(self, x: float, y: float, radius: float, color: tuple[float, float, float]):
+        """
+        Write one circle, circle with center out of image is skipped
+        """
+        width, height = self.image_size
+        x = x * self.scale + self.origin[0]
+        y = y * self.scale + self.origin[1]
+        if x < 0 or x > width or y < 0 or y > height:
+            return
+
+        colors = self.disc_colors(color)
+        if colors != self.color:
+            if self.color is not None:
+                self.file.write('</g>\n')
+            self.color = colors
+            self.dark, self.light, base = colors
+            self.file.write(f'<g fill="{base}">\n')
+            self.groups += 1
+
+        p = self.precision
+        r = round((abs(radius) + RADIUS_PAD) * self.scale, p)
+        d = self.offset
+        self.file.write(f'<circle cx="{round(x - d, p)}" cy="{round(y - d, p)}" r="{r}" fill="{self.dark}"/>'
+                        f'<circle cx="{round(x + d, p)}" cy="{round(y + d, p)}" r="{r}" fill="{self.light}"/>'
+                        f'<circle cx="{round(x, p)}" cy="{round(y, p)}" r="{r}"/>\n')
+        self.circles += 1
+
+    def close(self):
+        """
+        Close current group and SVG (file itself stays open)
+        """
+        if self.color is not None:
+            self.file.write('</g>\n')
+            self.color = None
+        self.file.write('</svg>\n')
+        logger.info(f"Written SVG: {self.circles} circles in {self.groups} groups")
+
+
+def export_svg(circles: Iterable[Circle], path: str, image_size: tuple[int, int], **kwargs) -> SvgWriter:
+    """
+    Write stream of circles to SVG file
+
+    :param circles: Circles, e.g. `Plant.get_circles()`
+    :param path: Path of SVG file
+    :param image_size: Size of image (width, height)
+    :param kwargs: Parameters of `SvgWriter`
+    :return: closed writer (with counts of circles and groups)
+    """
+    with open(path, "w") as file, SvgWriter(file, image_size, **kwargs) as writer:
+        writer.draw_circles(circles)
+    return writer
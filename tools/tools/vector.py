@@ -1,9 +1,11 @@
 from __future__ import annotations
 from random import randint
-from math import sin, cos, sqrt
+from math import sin, cos, sqrt, hypot
 
 
 class Vector:
+    __slots__ = ("_values", "_size")
+
     def __init__(self, *values):
         for value in values:
             if not isinstance(value, (int, float, complex)):
@@ -89,16 +91,72 @@ class Vector:
     
 
 class Vec2(Vector):
+    """
+    Two-dimensional vector
+
+    Stores components in slots and does arithmetic on them directly,
+    without generic loops of Vector. Vec2 is immutable (vectors are
+    shared, e.g. as default arguments), every operation returns new one
+    """
+    __slots__ = ("x", "y")
+
     def __init__(self, x: float, y: float):
-        super().__init__(x, y)
+        if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+            raise ValueError(f"Invalid type for Vec2 value: {type(x).__name__}, {type(y).__name__}")
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
 
-    @property 
-    def x(self) -> float:
-        return self._values[0]
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Can't change {name} of immutable Vec2")
 
-    @property 
-    def y(self) -> float:
-        return self._values[1]
+    @property
+    def size(self):
+        return 2
+
+    @property
+    def values(self):
+        return (self.x, self.y)
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __add__(self, other):
+        if not isinstance(other, Vec2):
+            return super().__add__(other)
+        return Vec2(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        if not isinstance(other, Vec2):
+            return super().__sub__(other)
+        return Vec2(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, other: int | float):
+        if not isinstance(other, (int, float)):
+            return super().__mul__(other)
+        return Vec2(self.x * other, self.y * other)
+
+    def __neg__(self):
+        return Vec2(-self.x, -self.y)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Vec2):
+            return self.x == other.x and self.y == other.y
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"Vec2({self.x}, {self.y})"
+
+    @property
+    def len(self) -> float:
+        return hypot(self.x, self.y)
+
+    @property
+    def ort(self) -> Vec2:
+        length = hypot(self.x, self.y)
+        if length == 0:
+            raise ZeroDivisionError("Can't divide Vector by Zero")
+        return Vec2(self.x / length, self.y / length)
 
     @staticmethod
     def random():
@@ -107,7 +165,8 @@ class Vec2(Vector):
             randint(-100, 100)
         )
 
-    def rotate(self, angle: float) -> Vec2:
+    def rotate(self, angle: float = 0, 
+               cos_a: float = None, sin_a: float = None) -> Vec2:
         """
         Rotate angle by given angle, 
         using rotation matrix
@@ -117,11 +176,14 @@ class Vec2(Vector):
         | sin(a)   cos(a) |   | y |
 
         :param angle: angle in radians
+        :param cos_a: precomputed cos of angle (angle is ignored if given)
+        :param sin_a: precomputed sin of angle (angle is ignored if given)
         """
-        x, y = self
-        return Vec2(x * cos(angle) - y * sin(angle), 
-                    x * sin(angle) + y * cos(angle)) 
-
+        if cos_a is None or sin_a is None:
+            cos_a, sin_a = cos(angle), sin(angle)
+        x, y = self.x, self.y
+        return Vec2(x * cos_a - y * sin_a, 
+                    x * sin_a + y * cos_a)
 
 
 class Vec3(Vector):